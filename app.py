@@ -1,6 +1,8 @@
-import streamlit as st, pandas as pd, subprocess, sys, os
+import streamlit as st, pandas as pd, numpy as np, os, time
 import folium
-from folium.plugins import MarkerCluster
+from folium.plugins import MarkerCluster, FastMarkerCluster, HeatMap
+from crawl_jobs import JobManager
+from rss_crawl_fast import cube_counts, cube_frame
 
 # Prefer streamlit_folium; fallback ke components.html
 try:
@@ -11,6 +13,30 @@ except Exception:
     def render_map(m): components.html(m._repr_html_(), height=650, scrolling=False)
 
 RESULT_PATH = "result.csv"
+RESULT_PARQUET = "result.parquet"  # kolumnar bertipe; dipakai bila ada
+RESULT_CUBE = "result_cube.parquet"  # kubus agregat jam×wilayah×topik×domain dari crawler
+TABLE_PAGE_SIZE = 100
+CATEGORY_COLS = ["source_domain", "topic_tag", "geocoder", "provinsi", "kab_kota"]
+MAP_FAST_THRESHOLD = 500  # di atas ini: satu layer FastMarkerCluster, popup dibangun di browser
+
+# Marker + popup dibuat di sisi klien dari array [lat, lon, topik, judul, waktu, frasa, tempat, wilayah, url]
+FAST_MARKER_JS = """
+function (row) {
+    var esc = function (v) {
+        return String(v == null ? "" : v).replace(/[&<>"']/g, function (c) {
+            return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+        });
+    };
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    if (row[2]) { marker.bindTooltip(esc(row[2])); }
+    marker.bindPopup(function () {
+        return "<b>" + esc(row[3]) + "</b><br><small>" + esc(row[4]) + "</small><br><i>" + esc(row[5]) +
+               "</i><br>" + esc(row[6]) + "<br>" + esc(row[7]) +
+               "<br><a href=\"" + esc(row[8]) + "\" target=\"_blank\">Baca sumber</a>";
+    }, {maxWidth: 350});
+    return marker;
+}
+"""
 
 st.set_page_config(page_title="Peta Demo/Protes Indonesia", layout="wide")
 st.title("Peta Demo/Protes Indonesia (News Crawler)")
@@ -28,55 +54,187 @@ with st.sidebar:
     run = st.button("Jalankan Crawling")
 
 # ---------------- Helpers ----------------
+@st.cache_resource
+def job_manager() -> JobManager:
+    return JobManager()
+
 def run_crawl():
-    cmd = [sys.executable, "rss_crawl_fast.py",
-           "--include", inc, "--when", when,
-           "--mode", "fast" if mode.startswith("fast") else "full",
-           "--out", RESULT_PATH,
-           "--target", str(target)]
+    """Mulai crawl di latar (job sama yang masih jalan digabung); output ditukar saat selesai."""
+    args = ["--include", inc, "--when", when,
+            "--mode", "fast" if mode.startswith("fast") else "full",
+            "--target", str(target), "--stream"]
     if province.strip():
-        cmd += ["--province", province.strip()]
+        args += ["--province", province.strip()]
     if id_only:
-        cmd += ["--id-media-only"]
+        args += ["--id-media-only"]
     if wide:
-        cmd += ["--wide"]
-    with st.spinner("Crawling..."):
-        subprocess.run(cmd, check=False)
+        args += ["--wide"]
+    return job_manager().submit(args, RESULT_PATH, RESULT_PARQUET, RESULT_CUBE)
 
-def load_df() -> pd.DataFrame:
-    if not os.path.exists(RESULT_PATH) or os.path.getsize(RESULT_PATH) == 0:
-        return pd.DataFrame()
+STAGE_LABELS = {"feeds": "Feed diambil", "extract": "Artikel diekstrak",
+                "ner": "Teks di-NER", "geocode": "Kandidat di-geocode", "write": "Baris ditulis"}
+
+def job_panel(live=False):
+    """Status job latar. Versi `live` (fragment, diulang tiap 2 dtk) hanya dipakai selama ada job berjalan;
+    setelah itu app dijalankan ulang penuh dan panel kembali statis."""
+    jm = job_manager()
+    if live and not jm.running():
+        st.rerun()  # job selesai/dibatalkan: panel statis menampilkan hasilnya
+    seen = st.session_state.setdefault("jobs_seen", {j.id for j in jm.jobs.values() if not j.running})
+    for job in jm.recent(3):
+        if job.running:
+            st.markdown(f"**Crawling berjalan** (`{job.key}`, {int(time.time() - job.started)} dtk)")
+            for stage, p in job.progress().items():
+                total = p.get("total") or 0
+                frac = min(1.0, p["done"] / total) if total else 0.0
+                st.progress(frac, text=f"{STAGE_LABELS.get(stage, stage)}: {p['done']}/{total or '?'}")
+            if st.button("Batalkan", key=f"cancel-{job.id}"):
+                job.cancel()
+                st.rerun()
+        elif job.finished and job.id not in seen:
+            seen.add(job.id)
+            if job.status == "done":
+                st.rerun()  # muat ulang data hasil job
+            elif job.status == "failed":
+                st.error(f"Crawling gagal (kode {job.returncode}).")
+                st.code(job.log_tail() or "(log kosong)")
+
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+_job_panel_live = _fragment(run_every=2)(job_panel) if _fragment is not None else None
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_typed(path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    """Dibaca sekali per versi file (kunci: path+mtime+size); rerun memakai frame yang sama."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
     try:
-        df = pd.read_csv(RESULT_PATH)
+        df = pd.read_csv(path)
     except pd.errors.EmptyDataError:
         return pd.DataFrame()
     # pastikan kolom UTC tz-aware
     if "published_at_utc" in df.columns:
         df["published_at_utc"] = pd.to_datetime(df["published_at_utc"], errors="coerce", utc=True)
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
     return df
 
-def draw_map(df: pd.DataFrame):
+def _version(path):
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        s = os.stat(path)
+        return path, s.st_mtime_ns, s.st_size
+    return None
+
+def data_version():
+    return _version(RESULT_PARQUET) or _version(RESULT_PATH)
+
+def load_df() -> pd.DataFrame:
+    v = data_version()
+    return _load_typed(*v) if v else pd.DataFrame()
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _cube_from_rows(path: str, mtime_ns: int, size: int, _df: pd.DataFrame) -> pd.DataFrame:
+    """Kubus untuk hasil tanpa file kubus (crawl lama / tanpa --out-cube); sekali per versi file."""
+    cols = [c for c in ["id", "cluster_id", "published_at_utc", "provinsi", "kab_kota", "topic_tag",
+                        "source_domain", "lat", "lon"] if c in _df.columns]
+    return cube_frame(cube_counts(_df[cols].to_dict("records")))
+
+def load_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Kubus dari crawler bila ditulis bersamaan/sesudah data; selain itu dihitung dari baris."""
+    v, cv = data_version(), _version(RESULT_CUBE)
+    if cv is not None and cv[1] >= v[1]:
+        return _load_typed(*cv)
+    return _cube_from_rows(*v, df)
+
+def trend_frame(cube: pd.DataFrame, top: int = 6) -> pd.DataFrame:
+    """Artikel per waktu × provinsi (top-N, sisanya 'Lainnya'); per jam bila rentang ≤ 3 hari."""
+    c = cube[cube["hour"].notna().to_numpy()]
+    if c.empty:
+        return pd.DataFrame()
+    freq = "h" if c["hour"].max() - c["hour"].min() <= pd.Timedelta(days=3) else "D"
+    top_prov = c.groupby("provinsi", observed=True)["n"].sum().nlargest(top).index
+    prov = c["provinsi"].astype(object).where(c["provinsi"].isin(top_prov), "Lainnya")
+    return (c.assign(t=c["hour"].dt.floor(freq).dt.tz_localize(None), prov=prov)
+             .pivot_table(index="t", columns="prov", values="n", aggfunc="sum", fill_value=0))
+
+def newest_first(df: pd.DataFrame, idx: np.ndarray) -> np.ndarray:
+    """Urutkan posisi baris terbaru dulu (tanpa tanggal di akhir) lewat int64, tanpa menyalin/sortir frame."""
+    if "published_at_utc" not in df.columns or not hasattr(df["published_at_utc"], "dt"):
+        return idx
+    k = df["published_at_utc"].values.view("i8")[idx]
+    nat = k == np.iinfo(np.int64).min
+    return idx[np.lexsort((-np.where(nat, 0, k), nat))]
+
+def isin_mask(s: pd.Series, values) -> np.ndarray:
+    """isin lewat kode kategori (int) bila kolom kategorikal; selain itu isin biasa."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.categories.get_indexer(list(values))
+        return np.isin(s.cat.codes.to_numpy(), codes[codes >= 0])
+    return s.isin(values).to_numpy()
+
+def _text_col(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[col].astype(object).where(df[col].notna(), "")
+
+def fast_marker_rows(df: pd.DataFrame) -> list:
+    """Data marker tervektorisasi: satu list per titik, tanpa iterrows/objek folium per baris."""
+    place = _text_col(df, "street").where(_text_col(df, "street") != "", _text_col(df, "place_name"))
+    region = _text_col(df, "kecamatan") + ", " + _text_col(df, "kab_kota") + ", " + _text_col(df, "provinsi")
+    pub = (df["published_at_utc"].dt.strftime("%Y-%m-%d %H:%M UTC").fillna("")
+           if "published_at_utc" in df.columns and hasattr(df["published_at_utc"], "dt")
+           else _text_col(df, "published_at_utc"))
+    cols = [df["lat"].round(6), df["lon"].round(6), _text_col(df, "topic_tag"), _text_col(df, "title"),
+            pub, _text_col(df, "mention_phrase"), place, region, _text_col(df, "source_url")]
+    return pd.concat(cols, axis=1).to_numpy(dtype=object).tolist()
+
+def one_per_cluster(df: pd.DataFrame) -> pd.DataFrame:
+    """Satu baris (wakil = kemunculan pertama) per klaster berita hampir sama; judul diberi jumlah sumber lain."""
+    if "cluster_id" not in df.columns:
+        return df
+    out = df[(df["cluster_id"].isna() | ~df["cluster_id"].duplicated()).to_numpy()].copy()
+    if "cluster_size" in out.columns:
+        extra = out["cluster_size"].fillna(1).astype(int) - 1
+        out["title"] = out["title"].astype(object).where(
+            extra <= 0, out["title"].astype(str) + " (+" + extra.astype(str) + " sumber lain)")
+    return out
+
+def draw_map(df: pd.DataFrame, style: str = "auto"):
+    """style: auto (marker per baris sampai MAP_FAST_THRESHOLD, lalu cluster cepat), fast, heatmap."""
     m = folium.Map(location=[-2.5, 117], zoom_start=5, control_scale=True)
     if df is not None and not df.empty and {"lat","lon"}.issubset(df.columns):
-        mc = MarkerCluster().add_to(m)
-        for _, r in df.dropna(subset=["lat","lon"]).iterrows():
-            popup = folium.Popup(f"""
-                <b>{r.get('title','')}</b><br>
-                <small>{r.get('published_at_utc')}</small><br>
-                <i>{r.get('mention_phrase','')}</i><br>
-                {(r.get('street') or r.get('place_name') or '')}<br>
-                {(r.get('kecamatan','') or '')}, {(r.get('kab_kota','') or '')}, {(r.get('provinsi','') or '')}<br>
-                <a href="{r.get('source_url','')}" target="_blank">Baca sumber</a>
-            """, max_width=350)
-            folium.Marker([r["lat"], r["lon"]],
-                          tooltip=r.get("topic_tag",""),
-                          popup=popup).add_to(mc)
+        pts = df.dropna(subset=["lat","lon"])
+        if style == "heatmap":
+            HeatMap(pts[["lat","lon"]].to_numpy().tolist(), radius=12, blur=15).add_to(m)
+        elif style == "fast" or len(pts) > MAP_FAST_THRESHOLD:
+            FastMarkerCluster(fast_marker_rows(pts), callback=FAST_MARKER_JS).add_to(m)
+        else:
+            mc = MarkerCluster().add_to(m)
+            for _, r in pts.iterrows():
+                popup = folium.Popup(f"""
+                    <b>{r.get('title','')}</b><br>
+                    <small>{r.get('published_at_utc')}</small><br>
+                    <i>{r.get('mention_phrase','')}</i><br>
+                    {(r.get('street') or r.get('place_name') or '')}<br>
+                    {(r.get('kecamatan','') or '')}, {(r.get('kab_kota','') or '')}, {(r.get('provinsi','') or '')}<br>
+                    <a href="{r.get('source_url','')}" target="_blank">Baca sumber</a>
+                """, max_width=350)
+                folium.Marker([r["lat"], r["lon"]],
+                              tooltip=r.get("topic_tag",""),
+                              popup=popup).add_to(mc)
     render_map(m)
 
 # ---------------- Run crawl jika diminta ----------------
 if run:
-    run_crawl()
-    st.success("Selesai. Hasil terbaru di bawah.")
+    job, is_new = run_crawl()
+    if is_new:
+        st.info("Crawling dimulai di latar. Peta diperbarui otomatis saat selesai.")
+    else:
+        st.info("Crawling dengan parameter yang sama sedang berjalan; menunggu hasilnya.")
+if _job_panel_live is not None and job_manager().running():
+    _job_panel_live(live=True)
+else:
+    job_panel()
 
 # ---------------- UI utama ----------------
 df = load_df()
@@ -86,60 +244,87 @@ with tab_map:
     if df.empty:
         st.warning("Belum ada data. Klik **Jalankan Crawling** di sidebar.")
     else:
-        c1, c2, c3 = st.columns(3)
-        with c1: st.metric("Total artikel", len(df))
-        with c2: st.metric("Titik tergeocode", int(df[["lat","lon"]].notna().all(axis=1).sum()))
-        with c3: st.metric("Sumber unik", df["source_domain"].nunique() if "source_domain" in df.columns else 0)
-        draw_map(df)
+        cube = load_cube(df)
+        c1, c2, c3, c4 = st.columns(4)
+        with c1: st.metric("Total artikel", int(cube["n"].sum()))
+        with c2: st.metric("Titik tergeocode", int(cube.loc[cube["geocoded"], "n"].sum()))
+        with c3: st.metric("Sumber unik", cube["source_domain"].nunique())
+        with c4: st.metric("Kejadian (klaster)", int(cube["stories"].sum()))
+        map_style = st.radio("Tampilan peta", ["Otomatis", "Cluster cepat", "Heatmap"], horizontal=True)
+        per_event = st.checkbox("Satu titik per kejadian (gabung berita sindikasi)", value=True,
+                                disabled="cluster_id" not in df.columns)
+        draw_map(one_per_cluster(df) if per_event else df,
+                 {"Otomatis": "auto", "Cluster cepat": "fast", "Heatmap": "heatmap"}[map_style])
 
 with tab_table:
     if df.empty:
         st.info("Belum ada data untuk ditampilkan.")
     else:
+        # pilihan filter, hitungan & tren dari kubus agregat; baris mentah hanya untuk halaman yang tampil
+        cube = load_cube(df)
         col1, col2, col3 = st.columns([1,1,2])
         with col1:
-            topics = sorted(df["topic_tag"].dropna().unique()) if "topic_tag" in df.columns else []
-            sel_topics = st.multiselect("Filter topik", topics, default=topics)
+            topic_n = cube.groupby("topic_tag", observed=True)["n"].sum()
+            topics = sorted(topic_n.index)
+            sel_topics = st.multiselect("Filter topik", topics, default=topics,
+                                        format_func=lambda t: f"{t} ({topic_n[t]})")
         with col2:
-            provs = sorted(df["provinsi"].dropna().unique()) if "provinsi" in df.columns else []
-            sel_prov = st.multiselect("Filter provinsi", provs, default=provs[:10] if len(provs)>10 else provs)
+            prov_n = cube.groupby("provinsi", observed=True)["n"].sum()
+            provs = sorted(prov_n.index)
+            sel_prov = st.multiselect("Filter provinsi", provs, default=provs[:10] if len(provs)>10 else provs,
+                                      format_func=lambda p: f"{p} ({prov_n[p]})")
         with col3:
-            if "published_at_utc" in df.columns and df["published_at_utc"].notna().any():
-                min_d = pd.to_datetime(df["published_at_utc"].min()).date()
-                max_d = pd.to_datetime(df["published_at_utc"].max()).date()
+            if cube["hour"].notna().any():
+                min_d = cube["hour"].min().date()
+                max_d = cube["hour"].max().date()
                 dr = st.date_input("Rentang tanggal (UTC)", (min_d, max_d))
             else:
                 dr = None
 
-        df_f = df.copy()
-        if "topic_tag" in df_f.columns and sel_topics:
-            df_f = df_f[df_f["topic_tag"].isin(sel_topics)]
-        if "provinsi" in df_f.columns and sel_prov:
-            df_f = df_f[df_f["provinsi"].isin(sel_prov)]
+        mask = np.ones(len(df), dtype=bool)
+        cmask = np.ones(len(cube), dtype=bool)
+        if "topic_tag" in df.columns and sel_topics:
+            mask &= isin_mask(df["topic_tag"], sel_topics)
+            cmask &= isin_mask(cube["topic_tag"], sel_topics)
+        if "provinsi" in df.columns and sel_prov:
+            mask &= isin_mask(df["provinsi"], sel_prov)
+            cmask &= isin_mask(cube["provinsi"], sel_prov)
 
         # Filter tanggal: semuanya tz-aware UTC
-        if dr and isinstance(dr, tuple) and len(dr) == 2 and "published_at_utc" in df_f.columns:
+        if dr and isinstance(dr, tuple) and len(dr) == 2 and "published_at_utc" in df.columns:
             start = pd.Timestamp(dr[0], tz="UTC")
             end = pd.Timestamp(dr[1], tz="UTC") + pd.Timedelta(days=1)  # end eksklusif
-            df_f = df_f[(df_f["published_at_utc"] >= start) & (df_f["published_at_utc"] < end)]
+            pub = df["published_at_utc"]
+            mask &= ((pub >= start) & (pub < end)).to_numpy()
+            cmask &= ((cube["hour"] >= start) & (cube["hour"] < end)).to_numpy()
+        cube_f = cube[cmask]
+
+        st.caption(f"{int(cube_f['n'].sum())} artikel cocok · {int(cube_f['stories'].sum())} kejadian · "
+                   f"{int(cube_f.loc[cube_f['geocoded'], 'n'].sum())} tergeocode")
+        trend = trend_frame(cube_f)
+        if not trend.empty:
+            st.line_chart(trend, height=220)
 
         show_cols = [c for c in [
             "published_at_utc","title","topic_tag","mention_phrase",
             "street","place_name","kecamatan","kab_kota","provinsi",
-            "geocoder","geocode_score","source_domain","source_url","q_src"
-        ] if c in df_f.columns]
-
-        st.dataframe(
-            df_f[show_cols].sort_values("published_at_utc", ascending=False, na_position="last"),
-            use_container_width=True, height=520
-        )
-
-        st.download_button(
-            "⬇️ Unduh CSV (hasil filter, UTC)",
-            data=df_f[show_cols].to_csv(index=False).encode("utf-8"),
-            file_name="demo_crawl_utc_filtered.csv",
-            mime="text/csv"
-        )
+            "geocoder","geocode_score","source_domain","source_url","q_src","cluster_size"
+        ] if c in df.columns]
+        col_pos = [df.columns.get_loc(c) for c in show_cols]
+
+        order = newest_first(df, np.flatnonzero(mask))
+        n_pages = max(1, -(-len(order) // TABLE_PAGE_SIZE))
+        page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+        page_idx = order[(page - 1) * TABLE_PAGE_SIZE: page * TABLE_PAGE_SIZE]
+        st.dataframe(df.iloc[page_idx, col_pos], use_container_width=True, height=520)
+
+        if st.button("Siapkan CSV (hasil filter, UTC)"):
+            st.download_button(
+                "⬇️ Unduh CSV",
+                data=df.iloc[order, col_pos].to_csv(index=False).encode("utf-8"),
+                file_name="demo_crawl_utc_filtered.csv",
+                mime="text/csv"
+            )
 
 st.markdown("---")
 st.caption("Aktifkan 'Perluas query' untuk demo+provinsi/kota se-Indonesia. Waktu difilter dalam UTC.")
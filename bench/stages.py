@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark offline per tahap crawler terhadap server stand-in lokal (bench/standin.py).
+
+    python bench/stages.py                           # 100, 1000, 10000 artikel
+    python bench/stages.py --sizes 100 --json out.json
+    python bench/stages.py --latency article=150,photon=60 --rate nominatim=1
+
+Tahap: feed_fetch (unduh+parse), feed_parse (parse saja), resolve_links (redirect → URL kanonis,
+cache kosong), fetch, extract_text,
+fetch_extract (pipeline), extract_locs, geocode_candidates, admin_fill (wilayah dari koordinat), csv_write.
+Tiap tahap melaporkan jumlah item, durasi, throughput, dan latensi p50/p95 per item
+bila item diproses satu per satu. Seed yang sama → data dan urutan kerja yang sama.
+"""
+import argparse, asyncio, json, math, os, subprocess, sys, tempfile, time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def pct(xs, p):
+    if not xs:
+        return None
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(math.ceil(p / 100 * len(xs))) - 1)]
+
+
+def stage(name, n, seconds, lat=None):
+    out = {"stage": name, "items": n, "seconds": round(seconds, 4),
+           "per_sec": round(n / seconds, 1) if seconds > 0 else None}
+    if lat:
+        out["p50_ms"] = round(pct(lat, 50) * 1000, 2)
+        out["p95_ms"] = round(pct(lat, 95) * 1000, 2)
+    return out
+
+
+def timed(lat, fn, is_async=False):
+    """Bungkus fungsi crawler supaya latensi tiap panggilan dicatat ke `lat`."""
+    if is_async:
+        async def wrap(*a, **k):
+            t = time.perf_counter()
+            try:
+                return await fn(*a, **k)
+            finally:
+                lat.append(time.perf_counter() - t)
+    else:
+        def wrap(*a, **k):
+            t = time.perf_counter()
+            try:
+                return fn(*a, **k)
+            finally:
+                lat.append(time.perf_counter() - t)
+    return wrap
+
+
+def run_size(c, base, n, workdir, args):
+    import httpx
+    results = []
+    items_per_feed = args.items_per_feed
+
+    # --- feed ---
+    feed_urls = [c.gnews_rss(f"bench {i}", when="24h") for i in range(max(1, math.ceil(n / items_per_feed)))]
+
+    async def feeds():
+        sem = asyncio.Semaphore(args.feed_workers)
+        async with c.feed_client(args.feed_workers) as client:
+            return await c.fetch_feeds(feed_urls, client, sem, state_dir=None)
+    t = time.perf_counter(); parsed = asyncio.run(feeds()); dt = time.perf_counter() - t
+    entries = sum(len(d.entries) for d in parsed)
+    results.append(stage("feed_fetch", entries, dt))
+
+    bodies = [httpx.get(u).content for u in feed_urls]
+    lat = []
+    t = time.perf_counter()
+    for b in bodies:
+        t1 = time.perf_counter(); c.feedparser.parse(b); lat.append(time.perf_counter() - t1)
+    results.append(stage("feed_parse", entries, time.perf_counter() - t, lat))
+
+    links = [e.link for d in parsed for e in d.entries][:n]
+    lat = []; orig = c._resolve_redirect; c._resolve_redirect = timed(lat, orig, is_async=True)
+
+    async def resolve():
+        cache = c.UrlCache(os.path.join(workdir, f"urls_{n}.sqlite"))
+        try:
+            async with c.feed_client(args.feed_workers) as client:
+                budget = c.ResolveBudget(len(links), len(links), args.feed_workers)  # tanpa batas: ukur semua
+                return await c.resolve_links(links, client, budget, cache)
+        finally:
+            cache.close()
+    try:
+        t = time.perf_counter(); asyncio.run(resolve())
+        results.append(stage("resolve_links", len(links), time.perf_counter() - t, lat))
+    finally:
+        c._resolve_redirect = orig
+
+    # --- artikel ---
+    urls = [f"{base}/article/{i}" for i in range(n)]
+    # stand-in = satu host untuk semua "situs": batas per host disamakan dengan batas global
+    fetch_opts = dict(per_host=args.fetch_workers, host_interval=0.0)
+    lat = []; orig = c.ArticleFetcher._get; c.ArticleFetcher._get = timed(lat, orig, is_async=True)
+    try:
+        t = time.perf_counter()
+        url2html = asyncio.run(c.fetch_html(urls, mode="full", max_concurrency=args.fetch_workers, **fetch_opts))
+        results.append(stage("fetch", n, time.perf_counter() - t, lat))
+    finally:
+        c.ArticleFetcher._get = orig
+
+    lat = []; bodies = {}
+    t = time.perf_counter()
+    for u in urls:
+        t1 = time.perf_counter(); bodies[u] = c.extract_text(url2html[u], u); lat.append(time.perf_counter() - t1)
+    results.append(stage("extract_text", n, time.perf_counter() - t, lat))
+    del url2html
+
+    t = time.perf_counter()
+    asyncio.run(c.fetch_extract(urls, max_concurrency=args.fetch_workers, extract_workers=args.extract_workers,
+                                **fetch_opts))
+    results.append(stage("fetch_extract", n, time.perf_counter() - t))
+
+    # --- NER ---
+    titles = [u.rsplit("/", 1)[1] for u in urls]
+    texts = [f"{title}\n{bodies[u]}" for title, u in zip(titles, urls)]
+    t = time.perf_counter()
+    all_locs = c.extract_locs_batch(texts, batch_size=args.ner_batch, n_process=args.ner_workers)
+    results.append(stage("extract_locs", n, time.perf_counter() - t))
+
+    # --- geocode ---
+    cands = sorted({l for locs in all_locs for l in locs[:6]}, key=lambda x: (-len(x), x))
+    lat = []; orig = c._geo_network; c._geo_network = timed(lat, orig)
+    try:
+        t = time.perf_counter()
+        geo = c.geocode_candidates(cands, cache_path=os.path.join(workdir, f"geo_{n}.sqlite"), workers=args.geo_workers)
+        results.append(stage("geocode_candidates", len(cands), time.perf_counter() - t, lat))
+    finally:
+        c._geo_network = orig
+
+    # --- tulis CSV ---
+    rows = []
+    for i, (u, locs) in enumerate(zip(urls, all_locs)):
+        g = next((geo[l] for l in locs[:6] if geo.get(l)), None) or {}
+        rows.append({"id": str(i), "title": titles[i], "source_url": u, "source_domain": "bench",
+                     "published_at_utc": "2025-09-01T00:00:00+00:00", "q_src": "bench",
+                     "raw_text": bodies[u][:1500], "key_phrases": "; ".join(locs[:10]), "topic_tag": "UMUM",
+                     "lat": g.get("lat"), "lon": g.get("lon"), "geocoder": g.get("geocoder"),
+                     "kab_kota": g.get("kab_kota"), "provinsi": g.get("provinsi")})
+    t = time.perf_counter()
+    c.fill_admin(rows)
+    results.append(stage("admin_fill", n, time.perf_counter() - t))
+
+    t = time.perf_counter()
+    c.write_output(rows, SimpleNamespace(out=os.path.join(workdir, f"out_{n}.csv"), out_parquet=None, out_cube=None, out_jsonl=None))
+    results.append(stage("csv_write", n, time.perf_counter() - t))
+    return results
+
+
+def start_standin(args):
+    cmd = [sys.executable, os.path.join(HERE, "standin.py"), "--seed", str(args.seed),
+           "--pool", str(max(args.sizes)), "--items-per-feed", str(args.items_per_feed),
+           "--latency", args.latency, "--rate", args.rate]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    base = proc.stdout.readline().strip()
+    if not base.startswith("http"):
+        proc.kill()
+        raise SystemExit("stand-in gagal start")
+    return proc, base
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,1000,10000", help="jumlah artikel per run, pisahkan koma")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--items-per-feed", type=int, default=100)
+    ap.add_argument("--latency", default="", help="diteruskan ke standin.py, mis. article=150,photon=60")
+    ap.add_argument("--rate", default="", help="diteruskan ke standin.py, mis. nominatim=1")
+    ap.add_argument("--feed-workers", type=int, default=8)
+    ap.add_argument("--fetch-workers", type=int, default=12)
+    ap.add_argument("--extract-workers", type=int, default=None)
+    ap.add_argument("--ner-workers", type=int, default=1)
+    ap.add_argument("--ner-batch", type=int, default=64)
+    ap.add_argument("--geo-workers", type=int, default=4)
+    ap.add_argument("--prod-geo-budget", action="store_true",
+                    help="pakai jeda Photon/Nominatim produksi (default: tanpa jeda, stand-in yang membatasi)")
+    ap.add_argument("--json", default=None, help="simpan laporan JSON ke path ini")
+    args = ap.parse_args()
+    args.sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+
+    proc, base = start_standin(args)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.environ.update(GNEWS_BASE=base, PHOTON_URL=f"{base}/api", NOMINATIM_URL=base,
+                              FEED_CACHE_DIR=os.path.join(workdir, "feeds"))
+            sys.path.insert(0, ROOT)
+            import rss_crawl_fast as c
+            # import lazy dilakukan di sini supaya tidak ikut terhitung di tahap pertama run pertama
+            c.pd.DataFrame; c.feedparser.parse; c.trafilatura.extract; c.ensure_gazetteer()
+            if not args.prod_geo_budget:
+                c.PHOTON_BUDGET.min_interval = 0.0
+                c.NOMINATIM_BUDGET.min_interval = 0.0
+            report = {"seed": args.seed, "spacy_model": c.ensure_nlp() is not None,
+                      "latency": args.latency, "rate": args.rate, "runs": []}
+            for n in args.sizes:
+                res = run_size(c, base, n, workdir, args)
+                report["runs"].append({"articles": n, "stages": res})
+                print(f"\n== {n} artikel ==")
+                print(f"{'tahap':<20}{'item':>8}{'detik':>10}{'item/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+                for r in res:
+                    print(f"{r['stage']:<20}{r['items']:>8}{r['seconds']:>10.3f}{(r['per_sec'] or 0):>10.1f}"
+                          f"{r.get('p50_ms', ''):>10}{r.get('p95_ms', ''):>10}")
+    finally:
+        proc.kill(); proc.wait()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Server pengganti (stand-in) lokal untuk semua layanan yang dipanggil crawler.
+
+    /rss/search?q=...   feed Google News RSS (dari fixtures/rss.xml + rss_item.xml)
+    /rss/articles/<id>  redirect 302 ke /article/<n> (id berbeda per feed, seperti link Google News)
+    /article/<n>        HTML artikel (fixtures/article.html)
+    /api?q=...          Photon (fixtures/photon.json)
+    /search?q=...       Nominatim (fixtures/nominatim.json)
+
+Isi dibangkitkan deterministik dari --seed + path, jadi run dengan parameter yang sama
+selalu melihat data yang sama. Latensi dan batas laju per rute bisa diatur:
+
+    python bench/standin.py --port 8800 --latency rss=80,article=150 --rate nominatim=1
+"""
+import argparse, hashlib, http.server, os, random, re, threading, time
+from urllib.parse import urlparse, parse_qs, unquote_plus
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+GAZETTEER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer_id.tsv")
+ROUTES = ("rss", "redirect", "article", "photon", "nominatim")
+
+SOURCES = [("Kompas.com", "kompas.com"), ("detikNews", "news.detik.com"), ("CNN Indonesia", "cnnindonesia.com"),
+           ("Tempo.co", "nasional.tempo.co"), ("ANTARA News", "antaranews.com"), ("Tribunnews.com", "tribunnews.com"),
+           ("Liputan6.com", "liputan6.com"), ("IDN Times", "idntimes.com"), ("Suara.com", "suara.com"),
+           ("The Jakarta Post", "thejakartapost.com")]
+STREETS = ["Jalan Sudirman", "Jalan MH Thamrin", "Jalan Gatot Subroto", "Jalan Diponegoro", "Jalan Ahmad Yani",
+           "Jalan Pahlawan", "Jalan Asia Afrika", "Jalan Pemuda", "Jalan Imam Bonjol", "Jalan Veteran"]
+TITLES = ["Demo mahasiswa di {place} ricuh, polisi tembakkan gas air mata",
+          "Ribuan buruh unjuk rasa di depan DPRD {prov}",
+          "Aksi protes di {street}, {place} berlangsung hingga malam",
+          "Polres {place} amankan puluhan peserta demo",
+          "Massa geruduk Gedung DPRD {prov}, tuntut pembatalan kebijakan",
+          "Kerusuhan pecah usai demo di {place}",
+          "Polda {prov} siagakan ribuan personel jelang aksi lanjutan"]
+PARAS = ["Ratusan massa aksi berkumpul di {street}, {place}, sejak pagi hari. Mereka membawa spanduk dan poster berisi tuntutan kepada pemerintah.",
+         "Kapolres {place} mengatakan pihaknya menurunkan personel gabungan untuk mengamankan jalannya unjuk rasa di depan Kantor DPRD {prov}.",
+         "Arus lalu lintas di sekitar lokasi dialihkan. Warga diimbau menghindari kawasan {street} hingga situasi kembali kondusif.",
+         "Koordinator lapangan aksi menyebut demonstrasi akan terus berlanjut di {place} apabila tuntutan tidak dipenuhi.",
+         "Sejumlah peserta aksi sempat terlibat saling dorong dengan aparat di dekat gerbang gedung DPRD {prov}.",
+         "Menjelang sore, massa mulai membubarkan diri dengan tertib dan menyisakan sampah di sepanjang {street}."]
+
+
+def _fill(tpl, vals):
+    return re.sub(r"\{(\w+)\}", lambda m: str(vals.get(m.group(1), m.group(0))), tpl)
+
+
+def _rng(*parts):
+    return random.Random(hashlib.md5("|".join(map(str, parts)).encode()).hexdigest())
+
+
+def load_places():
+    """(nama kota, provinsi, lat, lon) dari gazetteer bawaan repo."""
+    out = []
+    with open(GAZETTEER, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if cols[1] == "kab_kota":
+                out.append((cols[4], cols[7], float(cols[2]), float(cols[3])))
+    return out
+
+
+class TokenBucket:
+    def __init__(self, rate):
+        self.rate = rate; self.tokens = rate; self.last = time.monotonic(); self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class StandIn:
+    def __init__(self, seed=0, pool=10000, items_per_feed=100, paragraphs=8,
+                 photon_miss=0.2, nominatim_miss=0.5, latency=None, rate=None, jitter=0.2):
+        self.seed = seed
+        self.pool = pool
+        self.items_per_feed = items_per_feed
+        self.paragraphs = paragraphs
+        self.photon_miss = photon_miss
+        self.nominatim_miss = nominatim_miss
+        self.latency = latency or {}
+        self.jitter = jitter
+        self.buckets = {k: TokenBucket(v) for k, v in (rate or {}).items() if v}
+        self.places = load_places()
+        self.tpl = {n: open(os.path.join(FIXTURES, n), encoding="utf-8").read()
+                    for n in ("rss.xml", "rss_item.xml", "article.html", "photon.json", "nominatim.json")}
+        self.base = ""
+        self.counts = {k: 0 for k in ROUTES}
+        self.limited = {k: 0 for k in ROUTES}
+
+    # ---- data deterministik ----
+    def article_meta(self, n):
+        r = _rng(self.seed, "article", n)
+        city, prov, lat, lon = r.choice(self.places)
+        source, domain = r.choice(SOURCES)
+        vals = {"place": city, "prov": prov, "street": r.choice(STREETS)}
+        title = _fill(r.choice(TITLES), vals)
+        ts = 1756728000 - r.randrange(0, 86400)
+        return {**vals, "n": n, "title": title, "source": source, "domain": domain,
+                "link": f"{self.base}/article/{n}", "pubdate": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(ts))}
+
+    def rss(self, q):
+        r = _rng(self.seed, "rss", q)
+        ids = r.sample(range(self.pool), min(self.items_per_feed, self.pool))
+        items = []
+        for n in ids:
+            m = self.article_meta(n)
+            link = f"{self.base}/rss/articles/AU_yqL{n:x}_{r.randrange(1 << 32):08x}"
+            items.append(_fill(self.tpl["rss_item.xml"].strip(), {**m, "link": link, "guid": f"standin-{n}"}))
+        return _fill(self.tpl["rss.xml"], {"items": "\n".join(items)}).encode()
+
+    def article(self, n):
+        m = self.article_meta(n)
+        r = _rng(self.seed, "body", n)
+        paras = "\n".join(f"<p>{_fill(r.choice(PARAS), m)}</p>" for _ in range(self.paragraphs))
+        return _fill(self.tpl["article.html"], {**m, "lead": _fill(PARAS[0], m), "paragraphs": paras}).encode()
+
+    def _geo(self, route, q, miss):
+        r = _rng(self.seed, route, q)
+        if r.random() < miss:
+            return None
+        city, prov, lat, lon = r.choice(self.places)
+        return {"lat": round(lat + r.uniform(-0.02, 0.02), 6), "lon": round(lon + r.uniform(-0.02, 0.02), 6),
+                "city": city, "state": prov, "street": r.choice(STREETS), "district": f"Kecamatan {r.randrange(1, 30)}",
+                "name": q[:60].replace('"', "")}
+
+    def photon(self, q):
+        v = self._geo("photon", q, self.photon_miss)
+        return (_fill(self.tpl["photon.json"], v) if v else '{"features":[],"type":"FeatureCollection"}').encode()
+
+    def nominatim(self, q):
+        v = self._geo("nominatim", q, self.nominatim_miss)
+        return (_fill(self.tpl["nominatim.json"], v) if v else "[]").encode()
+
+    # ---- HTTP ----
+    def route(self, path):
+        if path.startswith("/rss/articles/"): return "redirect"
+        if path.startswith("/rss/"): return "rss"
+        if path.startswith("/article/"): return "article"
+        if path.startswith("/api"): return "photon"
+        if path.startswith("/search"): return "nominatim"
+        return None
+
+    def handler(self):
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                route = standin.route(u.path)
+                if route is None:
+                    return self._send(404, b"not found", "text/plain")
+                standin.counts[route] += 1
+                b = standin.buckets.get(route)
+                if b is not None and not b.take():
+                    standin.limited[route] += 1
+                    return self._send(429, b"rate limited", "text/plain", {"Retry-After": "1"})
+                ms = standin.latency.get(route, 0)
+                if ms:
+                    time.sleep(ms / 1000 * random.uniform(1 - standin.jitter, 1 + standin.jitter))
+                q = unquote_plus(parse_qs(u.query).get("q", [""])[0])
+                if route == "rss":
+                    self._send(200, standin.rss(q), "application/rss+xml; charset=utf-8")
+                elif route == "redirect":
+                    m = re.match(r"AU_yqL([0-9a-f]+)_", u.path.rsplit("/", 1)[1])
+                    if not m: return self._send(404, b"not found", "text/plain")
+                    self._send(302, b"", "text/plain", {"Location": f"{standin.base}/article/{int(m.group(1), 16)}"})
+                elif route == "article":
+                    try: n = int(u.path.rsplit("/", 1)[1])
+                    except ValueError: return self._send(404, b"not found", "text/plain")
+                    self._send(200, standin.article(n), "text/html; charset=utf-8")
+                elif route == "photon":
+                    self._send(200, standin.photon(q), "application/json")
+                else:
+                    self._send(200, standin.nominatim(q), "application/json")
+
+            def _send(self, code, body, ctype, headers=None):
+                self.send_response(code)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=0):
+        srv = http.server.ThreadingHTTPServer((host, port), self.handler())
+        srv.daemon_threads = True
+        self.base = f"http://{host}:{srv.server_address[1]}"
+        return srv
+
+
+def _kv(s, cast=float):
+    out = {}
+    for part in filter(None, (s or "").split(",")):
+        k, v = part.split("=")
+        if k.strip() not in ROUTES:
+            raise SystemExit(f"rute tidak dikenal: {k} (pilih: {', '.join(ROUTES)})")
+        out[k.strip()] = cast(v)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--pool", type=int, default=10000, help="jumlah artikel berbeda yang bisa muncul di feed")
+    ap.add_argument("--items-per-feed", type=int, default=100)
+    ap.add_argument("--paragraphs", type=int, default=8)
+    ap.add_argument("--photon-miss", type=float, default=0.2)
+    ap.add_argument("--nominatim-miss", type=float, default=0.5)
+    ap.add_argument("--latency", default="", help="ms per rute, mis. rss=80,article=150,photon=60,nominatim=200")
+    ap.add_argument("--rate", default="", help="req/s per rute (429 bila lewat), mis. nominatim=1")
+    args = ap.parse_args()
+    si = StandIn(seed=args.seed, pool=args.pool, items_per_feed=args.items_per_feed, paragraphs=args.paragraphs,
+                 photon_miss=args.photon_miss, nominatim_miss=args.nominatim_miss,
+                 latency=_kv(args.latency), rate=_kv(args.rate))
+    srv = si.serve(port=args.port)
+    print(si.base, flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
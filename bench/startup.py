@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark start-up crawler: biaya import (-X importtime) + waktu sampai request feed pertama.
+
+    python bench/startup.py            # ringkasan
+    python bench/startup.py --json     # untuk dicatat/dibandingkan antar-commit
+
+Request feed pertama diukur dengan server RSS lokal (GNEWS_BASE diarahkan ke sana),
+dari saat proses crawler di-spawn sampai request pertama tiba di server.
+"""
+import argparse, http.server, json, os, statistics, subprocess, sys, tempfile, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CRAWLER = os.path.join(ROOT, "rss_crawl_fast.py")
+EMPTY_RSS = b'<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title></channel></rss>'
+
+
+def import_profile(top=10):
+    """Total import rss_crawl_fast (ms) + modul dengan waktu kumulatif terbesar."""
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", "import rss_crawl_fast"],
+                       cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in p.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cum_us, name = [x.strip() for x in line.replace("import time:", "|").split("|")]
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+    total = next((cum for name, _, cum in rows if name == "rss_crawl_fast"), None)
+    heavy = sorted(rows, key=lambda r: -r[2])[:top]
+    return {"import_ms": total / 1000 if total else None,
+            "top": [{"module": n, "cumulative_ms": c / 1000} for n, _, c in heavy]}
+
+
+def first_feed_request_ms(workdir):
+    """Spawn crawler → request pertama diterima server lokal (ms)."""
+    arrived = threading.Event()
+    stamp = {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not arrived.is_set():
+                stamp["t"] = time.perf_counter(); arrived.set()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.end_headers()
+            self.wfile.write(EMPTY_RSS)
+
+        def log_message(self, *a):
+            pass
+
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    env = dict(os.environ, GNEWS_BASE=f"http://127.0.0.1:{srv.server_address[1]}",
+               FEED_CACHE_DIR=os.path.join(workdir, "feeds"))
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, CRAWLER, "--include", "demo", "--target", "1",
+                             "--out", os.path.join(workdir, "out.csv")],
+                            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    ok = arrived.wait(60)
+    proc.kill(); proc.wait()
+    srv.shutdown()
+    return (stamp["t"] - t0) * 1000 if ok else None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    prof = import_profile()
+    with tempfile.TemporaryDirectory() as d:
+        ttf = [first_feed_request_ms(d) for _ in range(args.runs)]
+    ttf = [x for x in ttf if x is not None]
+    report = {**prof, "runs": args.runs,
+              "first_feed_request_ms": {"median": statistics.median(ttf) if ttf else None,
+                                        "min": min(ttf) if ttf else None,
+                                        "max": max(ttf) if ttf else None}}
+    if args.json:
+        print(json.dumps(report, indent=2)); return
+    print(f"import rss_crawl_fast: {report['import_ms']:.1f} ms")
+    for t in report["top"]:
+        print(f"  {t['cumulative_ms']:8.1f} ms  {t['module']}")
+    f = report["first_feed_request_ms"]
+    if f["median"] is not None:
+        print(f"time-to-first-feed-request: median {f['median']:.0f} ms (min {f['min']:.0f}, max {f['max']:.0f}, n={len(ttf)})")
+
+
+if __name__ == "__main__":
+    main()
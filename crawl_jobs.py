@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Job crawling di latar untuk app Streamlit.
+
+Tiap job = satu proses rss_crawl_fast.py yang menulis ke file miliknya sendiri
+(.jobs/<key>-<waktu>.csv/.parquet/.cube.parquet) plus file progres JSON. Hasil baru ditukar ke path
+utama (os.replace, atomik) setelah proses selesai sukses. Job dengan parameter
+sama yang masih berjalan digabung: pemanggil kedua menerima job yang sama.
+
+Bila CRAWLER_DAEMON_URL diisi (daemon `rss_crawl_fast.py --serve`), job dikirim ke daemon
+itu (model & koneksi sudah hangat); daemon tidak terjangkau → kembali ke proses biasa.
+"""
+import hashlib, json, os, subprocess, sys, threading, time
+import urllib.request
+
+JOBS_DIR = ".jobs"
+CRAWLER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rss_crawl_fast.py")
+DAEMON_URL = os.getenv("CRAWLER_DAEMON_URL")  # mis. http://127.0.0.1:8765; kosong = selalu subprocess
+DAEMON_POLL = 1.0  # detik antar-tanya status job ke daemon
+JOB_FILES_KEEP = 86400  # detik sebelum file job lama (log, progres, sisa output) dihapus
+DAEMON_TOKEN = os.getenv("CRAWLER_DAEMON_TOKEN")  # dikirim sebagai Bearer bila daemon memintanya
+
+
+def _daemon_call(url, payload=None, timeout=5):
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if DAEMON_TOKEN:
+        headers["Authorization"] = f"Bearer {DAEMON_TOKEN}"
+    req = urllib.request.Request(url, data=data, headers=headers)
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return json.load(r)
+
+
+class CrawlJob:
+    def __init__(self, key, args, result_csv, result_parquet, result_cube=None, jobs_dir=JOBS_DIR):
+        self.key = key
+        self.args = list(args)
+        self.result_csv = result_csv
+        self.result_parquet = result_parquet
+        self.result_cube = result_cube
+        self.started = time.time()
+        # path unik per submit: job daemon yang dibatalkan bisa masih menulis sampai titik batalnya
+        self.id = f"{key}-{int(self.started * 1000)}"
+        base = os.path.join(os.path.abspath(jobs_dir), self.id)
+        self.out_csv = base + ".csv"
+        self.out_parquet = base + ".parquet"
+        self.out_cube = base + ".cube.parquet"
+        self.progress_path = base + ".progress.json"
+        self.log_path = base + ".log"
+        self.status = "running"  # running / done / failed / cancelled
+        self.finished = None
+        self.returncode = None
+        self._cancelled = False
+        os.makedirs(jobs_dir, exist_ok=True)
+        argv = [*self.args, "--out", self.out_csv, "--out-parquet", self.out_parquet,
+                "--progress", self.progress_path]
+        if result_cube:
+            argv += ["--out-cube", self.out_cube]
+        self._start(argv)
+
+    def _start(self, argv):
+        self._log = open(self.log_path, "w", encoding="utf-8")
+        self.proc = subprocess.Popen([sys.executable, CRAWLER, *argv], stdout=self._log, stderr=subprocess.STDOUT)
+        threading.Thread(target=self._wait, daemon=True).start()
+
+    def _wait(self):
+        rc = self.proc.wait()
+        self._log.close()
+        self._finish(rc)
+
+    def _finish(self, rc):
+        self.returncode = rc
+        if self._cancelled:
+            self.status = "cancelled"
+        elif rc == 0 and os.path.exists(self.out_csv):
+            # parquet dulu: app membaca parquet lebih dulu daripada CSV
+            if self.result_cube and os.path.exists(self.out_cube):
+                os.replace(self.out_cube, self.result_cube)
+            if os.path.exists(self.out_parquet):
+                os.replace(self.out_parquet, self.result_parquet)
+            os.replace(self.out_csv, self.result_csv)
+            self.status = "done"
+        else:
+            self.status = "failed"
+        self.finished = time.time()
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    def progress(self) -> dict:
+        """{tahap: {done, total}} terakhir yang dilaporkan crawler (kosong bila belum ada)."""
+        try:
+            with open(self.progress_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("stages", {})
+        except Exception:
+            return {}
+
+    def log_tail(self, n=20) -> str:
+        try:
+            with open(self.log_path, "r", encoding="utf-8", errors="replace") as f:
+                return "".join(f.readlines()[-n:])
+        except Exception:
+            return ""
+
+    def cancel(self):
+        """Langsung dilaporkan 'cancelled' (path job unik, jadi submit ulang tidak bertabrakan)."""
+        if self.running:
+            self._cancelled = True
+            self.status = "cancelled"
+            self.finished = time.time()
+            self.proc.terminate()
+
+
+class DaemonCrawlJob(CrawlJob):
+    """Job yang dikerjakan daemon crawler; output & progres tetap ke file job (path absolut),
+    status ditanyakan berkala lewat HTTP. Gagal menghubungi daemon saat mulai → OSError."""
+    def __init__(self, daemon_url, *args, **kwargs):
+        self.daemon_url = daemon_url.rstrip("/")
+        self.remote_id = None
+        self._log_text = ""
+        super().__init__(*args, **kwargs)
+
+    def _start(self, argv):
+        self.remote_id = _daemon_call(self.daemon_url + "/crawl", {"args": argv})["job"]["id"]
+        threading.Thread(target=self._wait, daemon=True).start()
+
+    def _wait(self):
+        errors = 0
+        while True:
+            time.sleep(DAEMON_POLL)
+            if not self.running:
+                return  # dibatalkan dari app; daemon menghentikan job-nya sendiri
+            try:
+                info = _daemon_call(f"{self.daemon_url}/jobs/{self.remote_id}")
+                errors = 0
+            except OSError as e:
+                errors += 1
+                if errors < 10:
+                    continue
+                info = {"status": "failed", "log": f"daemon tidak menjawab: {e}"}
+            if info["status"] in ("queued", "running"):
+                continue
+            self._log_text = info.get("log", "")
+            self._cancelled = self._cancelled or info["status"] == "cancelled"
+            self._finish(0 if info["status"] == "done" else 1)
+            return
+
+    def log_tail(self, n=20) -> str:
+        return "".join(self._log_text.splitlines(True)[-n:])
+
+    def cancel(self):
+        """Langsung dilaporkan 'cancelled' (output job ini tidak dipakai), jadi submit berikutnya
+        dengan parameter sama membuat job baru; daemon berhenti di titik progres berikutnya."""
+        if self.running:
+            self._cancelled = True
+            self.status = "cancelled"
+            self.finished = time.time()
+            try:
+                _daemon_call(f"{self.daemon_url}/jobs/{self.remote_id}/cancel", {})
+            except OSError:
+                pass
+
+
+class JobManager:
+    """Registry job per proses app (dibagi semua sesi lewat st.cache_resource)."""
+    def __init__(self, jobs_dir=JOBS_DIR, daemon_url=DAEMON_URL):
+        self.jobs_dir = jobs_dir
+        self.daemon_url = daemon_url
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(args) -> str:
+        return hashlib.sha1(json.dumps(list(args)).encode()).hexdigest()[:12]
+
+    def submit(self, args, result_csv, result_parquet, result_cube=None):
+        """Mulai job baru, atau kembalikan job berjalan dengan parameter sama. → (job, baru?)"""
+        key = self.job_key(args)
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None and job.running:
+                return job, False
+            self._prune_files()
+            job = None
+            if self.daemon_url:
+                try:
+                    job = DaemonCrawlJob(self.daemon_url, key, args, result_csv, result_parquet,
+                                         result_cube, self.jobs_dir)
+                except (OSError, KeyError, ValueError):
+                    job = None  # daemon mati / menolak → proses biasa
+            if job is None:
+                job = CrawlJob(key, args, result_csv, result_parquet, result_cube, self.jobs_dir)
+            self.jobs[key] = job
+            return job, True
+
+    def _prune_files(self):
+        cutoff = time.time() - JOB_FILES_KEEP
+        try:
+            entries = list(os.scandir(self.jobs_dir))
+        except OSError:
+            return
+        for e in entries:
+            try:
+                if e.is_file() and e.stat().st_mtime < cutoff:
+                    os.remove(e.path)
+            except OSError:
+                pass
+
+    def running(self):
+        return [j for j in self.jobs.values() if j.running]
+
+    def recent(self, n=5):
+        return sorted(self.jobs.values(), key=lambda j: j.started, reverse=True)[:n]
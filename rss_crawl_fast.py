@@ -1,24 +1,217 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from __future__ import annotations
 
-import argparse, asyncio, json, os, re, time, hashlib, math
+import argparse, asyncio, base64, hmac, importlib, io, ipaddress, json, os, queue, random, re, time, hashlib, math, sqlite3, threading, traceback
+from bisect import bisect_right
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext, redirect_stdout, suppress
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from urllib.parse import quote_plus, urlparse
 
-import feedparser
-import httpx
-import pandas as pd
-import requests
-import trafilatura
-import dateparser
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
+class _LazyModule:
+    """Proksi modul: import baru terjadi saat atribut pertama diakses.
+    Mode fast tidak pernah menyentuh trafilatura; pandas baru dimuat saat menulis hasil."""
+    def __init__(self, name):
+        self._name = name
+        self._mod = None
+
+    def __getattr__(self, attr):
+        if self._mod is None:
+            self._mod = importlib.import_module(self._name)
+        return getattr(self._mod, attr)
+
+feedparser  = _LazyModule("feedparser")
+httpx       = _LazyModule("httpx")
+pd          = _LazyModule("pandas")
+np          = _LazyModule("numpy")
+requests    = _LazyModule("requests")
+trafilatura = _LazyModule("trafilatura")
+pa          = _LazyModule("pyarrow")
+pq          = _LazyModule("pyarrow.parquet")
+dateparser  = _LazyModule("dateparser")
+
 # =========================
 # KONFIG
 # =========================
 UA = os.getenv("APP_USER_AGENT", "id-demo-mapper/1.8 (contact: you@example.com)")
-PHOTON = "https://photon.komoot.io/api"
+PHOTON = os.getenv("PHOTON_URL", "https://photon.komoot.io/api")
+NOMINATIM_URL = os.getenv("NOMINATIM_URL")  # kosong = nominatim.openstreetmap.org
+GNEWS_BASE = os.getenv("GNEWS_BASE", "https://news.google.com")
 UTC = ZoneInfo("UTC")
 MAX_PER_FEED = 100  # kapasitas kira-kira per feed Google News RSS
+QUERY_STATS_PATH = "query_stats.sqlite"  # riwayat yield per query (perencana query)
+FEED_STATE_DIR = os.getenv("FEED_CACHE_DIR", ".feed_cache")  # ETag/Last-Modified + isi feed terakhir
+GEO_CACHE_PATH = "geocode_cache.sqlite"
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+GAZETTEER_PATH = os.path.join(DATA_DIR, "gazetteer_id.tsv")
+RULES_PATH = os.path.join(DATA_DIR, "rules.json")  # topik, exclude, whitelist media
+ADMIN_PATH = os.path.join(DATA_DIR, "admin_id.geojson")  # opsional: batas kecamatan/kab/kota/provinsi
+GEO_TTL_DAYS = 30        # umur hasil geocode yang ketemu
+GEO_NEG_TTL_HOURS = 24   # umur hasil "tidak ketemu" (dicoba lagi setelahnya)
+URL_CACHE_PATH = "url_cache.sqlite"  # redirect Google News → URL penerbit
+URL_TTL_DAYS = 90        # pemetaan redirect praktis tidak pernah berubah
+URL_NEG_TTL_HOURS = 72   # redirect yang gagal di-resolve dicoba lagi setelahnya
+URL_RESOLVE_MAX = 50     # resolve lewat jaringan per crawl (sisanya tetap link Google News)
+URL_RESOLVE_CONCURRENCY = 2  # terpisah dari slot feed, supaya tidak bersaing dengan unduhan feed
+URL_RESOLVE_PROBE = 8    # N percobaan pertama tanpa satu pun redirect → berhenti untuk crawl ini
+
+# =========================
+# Progres per tahap (file JSON, dibaca app untuk job latar)
+# =========================
+class CrawlCancelled(Exception):
+    """Job daemon dibatalkan; dilempar di titik progres berikutnya (Progress.check)."""
+
+class Progress:
+    """Simpan {tahap: {done, total}} ke file JSON secara atomik; tanpa path → no-op.
+    Tiap update juga titik batal: setelah `cancelled` diset, update berikutnya melempar CrawlCancelled."""
+    def __init__(self, path=None, min_interval=0.5):
+        self.path = path
+        self.min_interval = min_interval
+        self.stages = {}
+        self.cancelled = threading.Event()  # diset CrawlDaemon.cancel untuk job yang sedang berjalan
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise CrawlCancelled("crawl dibatalkan")
+
+    def update(self, stage, done, total=None):
+        self.check()
+        if not self.path:
+            return
+        with self._lock:
+            self.stages[stage] = {"done": done, "total": total}
+            now = time.monotonic()
+            if total is not None and done < total and now - self._last < self.min_interval:
+                return
+            self._last = now
+            tmp = self.path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"stage": stage, "stages": self.stages, "updated": time.time()}, f)
+                os.replace(tmp, self.path)
+            except Exception:
+                pass
+
+PROGRESS = Progress()
+
+# =========================
+# Metrik run: timer tahap, counter, histogram latensi → JSON / Prometheus
+# =========================
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _prom_name(name, labels=()):
+    if not labels:
+        return name
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return name + "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+class Metrics:
+    """Metrik satu run crawler; aman dipakai banyak thread."""
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}     # nama tahap → detik
+        self.counters = {}   # (nama, label) → nilai
+        self.hists = {}      # (nama, label) → [jumlah per bucket..., +Inf], sum
+
+    def inc(self, name, n=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            h = self.hists.setdefault(key, {"counts": [0] * (len(self.BUCKETS) + 1), "sum": 0.0})
+            i = next((i for i, b in enumerate(self.BUCKETS) if seconds <= b), len(self.BUCKETS))
+            h["counts"][i] += 1
+            h["sum"] += seconds
+
+    def merge(self, other):
+        """Tambahkan isi `other` (metrik satu job daemon) ke total ini."""
+        with other._lock:
+            stages, counters = dict(other.stages), dict(other.counters)
+            hists = {k: {"counts": list(h["counts"]), "sum": h["sum"]} for k, h in other.hists.items()}
+        with self._lock:
+            for k, v in stages.items():
+                self.stages[k] = self.stages.get(k, 0.0) + v
+            for k, v in counters.items():
+                self.counters[k] = self.counters.get(k, 0) + v
+            for k, h in hists.items():
+                mine = self.hists.setdefault(k, {"counts": [0] * (len(self.BUCKETS) + 1), "sum": 0.0})
+                mine["counts"] = [a + b for a, b in zip(mine["counts"], h["counts"])]
+                mine["sum"] += h["sum"]
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + dt
+
+    def report(self):
+        with self._lock:
+            hists = {}
+            for (name, labels), h in self.hists.items():
+                cum, buckets = 0, {}
+                for b, c in zip(list(self.BUCKETS) + ["+Inf"], h["counts"]):
+                    cum += c; buckets[str(b)] = cum
+                hists[_prom_name(name, labels)] = {"count": cum, "sum": round(h["sum"], 6), "buckets": buckets}
+            return {"started_at_utc": datetime.fromtimestamp(self.started, UTC).isoformat(),
+                    "duration_seconds": round(time.time() - self.started, 3),
+                    "stages_seconds": {k: round(v, 4) for k, v in self.stages.items()},
+                    "counters": {_prom_name(n, l): v for (n, l), v in sorted(self.counters.items())},
+                    "histograms": hists}
+
+    def write_json(self, path):
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def write_prom(self, path, prefix="crawler_"):
+        """Format teks Prometheus (untuk node_exporter textfile collector)."""
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.prom_text(prefix))
+        os.replace(path + ".tmp", path)
+
+    def prom_text(self, prefix="crawler_"):
+        lines = []
+        with self._lock:
+            lines.append(f"# TYPE {prefix}run_duration_seconds gauge")
+            lines.append(f"{prefix}run_duration_seconds {time.time() - self.started:.3f}")
+            lines.append(f"# TYPE {prefix}stage_seconds gauge")
+            for k, v in self.stages.items():
+                lines.append(f"{_prom_name(prefix + 'stage_seconds', (('stage', k),))} {v:.6f}")
+            typed = set()
+            for (name, labels), v in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {prefix}{name} counter"); typed.add(name)
+                lines.append(f"{_prom_name(prefix + name, labels)} {v:g}")
+            for (name, labels), h in sorted(self.hists.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {prefix}{name} histogram"); typed.add(name)
+                cum = 0
+                for b, c in zip(list(self.BUCKETS) + ["+Inf"], h["counts"]):
+                    cum += c
+                    lines.append(f"{_prom_name(prefix + name + '_bucket', labels + (('le', str(b)),))} {cum}")
+                lines.append(f"{_prom_name(prefix + name + '_sum', labels)} {h['sum']:.6f}")
+                lines.append(f"{_prom_name(prefix + name + '_count', labels)} {cum}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
 
 # =========================
 # spaCy NER (fallback jika gagal)
@@ -30,7 +223,8 @@ def ensure_nlp():
         return _NLP
     try:
         import spacy
-        _NLP = spacy.load("xx_ent_wiki_sm")
+        # hanya NER yang dipakai; komponen lain dimatikan supaya nlp.pipe lebih ringan
+        _NLP = spacy.load("xx_ent_wiki_sm", enable=["ner"])
     except Exception:
         _NLP = None
     return _NLP
@@ -46,30 +240,337 @@ ADDR_RE = re.compile(
 )
 
 # =========================
-# Landmark → koordinat langsung
+# Pencocokan multi-pola (Aho-Corasick)
+# =========================
+class AhoCorasick:
+    """Automaton multi-pola: semua kemunculan semua pola dalam satu lintasan teks."""
+    def __init__(self, patterns):
+        # patterns: iterable (pola, nilai); pola dicocokkan apa adanya (lowercase-kan sebelumnya)
+        self._goto = [{}]; self._fail = [0]; self._out = [[]]
+        for pat, val in patterns:
+            if not pat:
+                continue
+            st = 0
+            for ch in pat:
+                nxt = self._goto[st].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({}); self._fail.append(0); self._out.append([])
+                    self._goto[st][ch] = nxt
+                st = nxt
+            self._out[st].append((len(pat), val))
+        todo = deque(self._goto[0].values())
+        while todo:
+            st = todo.popleft()
+            for ch, nxt in self._goto[st].items():
+                todo.append(nxt)
+                f = self._fail[st]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter(self, text):
+        """Yield (awal, akhir, nilai) untuk setiap kemunculan pola."""
+        st = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for i, ch in enumerate(text):
+            while st and ch not in goto[st]:
+                st = fail[st]
+            st = goto[st].get(ch, 0)
+            for plen, val in out[st]:
+                yield i - plen + 1, i + 1, val
+
+def _lower_same_len(text):
+    low = text.lower()
+    if len(low) != len(text):  # mis. 'İ' → 2 karakter; jaga posisi tetap sejajar
+        low = "".join(c.lower()[:1] for c in text)
+    return low
+
+def _is_word_bound(text, i):
+    return i <= 0 or i >= len(text) or not text[i].isalnum()
+
+def find_longest(ac, text, whole_words=True):
+    """Kemunculan terpanjang paling kiri, tidak tumpang tindih: list (awal, akhir, nilai)."""
+    low = _lower_same_len(text)
+    hits = sorted(((a, -b, v) for a, b, v in ac.iter(low)
+                   if not whole_words or (_is_word_bound(low, a-1) and _is_word_bound(low, b))))
+    out, end = [], 0
+    for a, nb, v in hits:
+        if a >= end:
+            out.append((a, -nb, v)); end = -nb
+    return out
+
+# =========================
+# Gazetteer lokal: provinsi, kab/kota, kecamatan, landmark → koordinat tanpa jaringan
+# =========================
+GAZ_SCORE = {"landmark": 1.0, "kecamatan": 0.8, "kab_kota": 0.7, "provinsi": 0.5}
+_AMBIGUOUS_PREFIX_RE = re.compile(r"\b(?:(kota|kabupaten|kab\.?)|di)\s+$", re.I)
+_NEXT_CAPITAL_RE = re.compile(r"\s+[A-Z]")
+_ADMIN_PREFIX_RE = re.compile(r"^(?:di\s+)?(?:kota|kabupaten|kab\.?|provinsi|prov\.?|kecamatan|kec\.?)\s+", re.I)
+
+class Gazetteer:
+    def __init__(self, entries):
+        self.entries = entries
+        self.by_alias = {}
+        self.ambiguous = set()  # alias yang juga kata umum ("~" di TSV)
+        for e in entries:
+            for alias in e.pop("aliases"):
+                if alias.startswith("~"):
+                    alias = alias[1:]; self.ambiguous.add(alias)
+                self.by_alias.setdefault(alias, e)
+        self._ac = AhoCorasick((a, a) for a in self.by_alias)
+        self._ac_landmark = AhoCorasick((a, a) for a, e in self.by_alias.items() if e["kind"] == "landmark")
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                aliases, kind, lat, lon, name, kec, kab, prov = line.rstrip("\n").split("\t")
+                entries.append({"aliases": [a.strip() for a in aliases.split("|") if a.strip()],
+                                "kind": kind, "lat": float(lat), "lon": float(lon), "place_name": name,
+                                "kecamatan": kec or None, "kab_kota": kab or None, "provinsi": prov or None})
+        return cls(entries)
+
+    @staticmethod
+    def hit(e):
+        return {"lat": e["lat"], "lon": e["lon"], "place_name": e["place_name"],
+                "geocoder": "priority" if e["kind"] == "landmark" else "gazetteer",
+                "score": GAZ_SCORE.get(e["kind"], 0.5),
+                "kecamatan": e["kecamatan"], "kab_kota": e["kab_kota"], "provinsi": e["provinsi"]}
+
+    def lookup(self, q):
+        """Nama persis (setelah awalan 'kota'/'kabupaten'/... dibuang) atau landmark yang disebut di dalamnya."""
+        q = " ".join(q.lower().split())
+        e = self.by_alias.get(q) or self.by_alias.get(_ADMIN_PREFIX_RE.sub("", q))
+        if e is None:
+            lm = find_longest(self._ac_landmark, q)
+            if lm:
+                e = self.by_alias[max(lm, key=lambda h: h[1]-h[0])[2]]
+        return self.hit(e) if e else None
+
+    def find(self, text):
+        """Semua sebutan tempat dalam teks (satu lintasan), urut kemunculan, unik per alias.
+        Hanya sebutan berhuruf awal kapital (nama diri) yang dihitung. Alias ambigu (kata umum, judul
+        sering Title Case) hanya bila didahului "kota"/"kabupaten", atau "di" tanpa kata kapital
+        sesudahnya ("di Medan, ..." ya; "di Padang Rumput" tidak)."""
+        out, seen = [], set()
+        for a, b, alias in find_longest(self._ac, text or ""):
+            if alias in seen or not text[a].isupper():
+                continue
+            if alias in self.ambiguous:
+                m = _AMBIGUOUS_PREFIX_RE.search(text, max(0, a - 12), a)
+                if m is None or (m.group(1) is None and _NEXT_CAPITAL_RE.match(text, b)):
+                    continue
+            seen.add(alias); out.append(text[a:b])
+        return out
+
+_GAZ = None
+def ensure_gazetteer():
+    global _GAZ
+    if _GAZ is None:
+        try:
+            _GAZ = Gazetteer.load()
+        except Exception:
+            _GAZ = Gazetteer([])
+    return _GAZ
+
+# =========================
+# Mesin aturan kata kunci: topik, exclude, whitelist media (data/rules.json)
 # =========================
-PRIORITY_PLACES = {
-    "gedung dpr": (-6.2128, 106.8006, "Gedung MPR/DPR/DPD RI, Senayan"),
-    "gedung mpr": (-6.2128, 106.8006, "Gedung MPR/DPR/DPD RI, Senayan"),
-    "polda metro jaya": (-6.2265, 106.8085, "Polda Metro Jaya"),
-    "istana merdeka": (-6.1701, 106.8247, "Istana Merdeka"),
-    "monas": (-6.175392, 106.827153, "Monumen Nasional"),
-}
+def _trie_regex(words):
+    """Satu regex dari trie kata (awalan bersama difaktorkan) → dicocokkan di C oleh modul re,
+    biaya per karakter nyaris tidak bertambah seiring jumlah kata."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    def build(node):
+        kids = sorted(k for k in node if k)
+        if not kids:
+            return ""
+        alts = [re.escape(ch) + build(node[ch]) for ch in kids]
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+    return build(trie)
+
+class RuleEngine:
+    """Semua kata kunci (topik + exclude) dalam satu automaton; satu lintasan per teks.
+    Lookahead di tiap posisi → kata terpanjang yang mulai di sana; kata lain yang merupakan
+    awalannya ikut dihitung lewat tabel `_hits`, jadi semantiknya = substring biasa."""
+    EXCLUDE = -1
+
+    def __init__(self, topics, default_topic="UMUM", exclude=(), media_domains=()):
+        self.tags = [t["tag"] for t in topics]
+        self.default_topic = default_topic
+        payload = {}
+        for prio, t in enumerate(topics):
+            for k in t["keywords"]:
+                payload.setdefault(k.lower(), set()).add(prio)
+        for k in exclude:
+            payload.setdefault(k.lower(), set()).add(self.EXCLUDE)
+        payload.pop("", None)
+        # kata yang cocok → semua payload kata yang menjadi awalannya (termasuk dirinya)
+        self._hits = {w: set().union(*(payload[w[:i]] for i in range(1, len(w)+1) if w[:i] in payload))
+                      for w in payload}
+        self._rx = re.compile("(?=(" + _trie_regex(payload) + "))") if payload else None
+        self._domains = {}
+        for d in media_domains:
+            node = self._domains
+            for label in reversed(d.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            node[""] = True
+
+    @classmethod
+    def load(cls, path=RULES_PATH, exclude=()):
+        with open(path, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        return cls(cfg.get("topics", []), cfg.get("default_topic", "UMUM"),
+                   list(cfg.get("exclude", [])) + list(exclude), cfg.get("media_domains", []))
+
+    def scan(self, text):
+        """→ (topik, excluded?) untuk satu teks."""
+        best, excluded = len(self.tags), False
+        if self._rx is not None:
+            for w in set(self._rx.findall((text or "").lower())):
+                for p in self._hits.get(w, ()):
+                    if p == self.EXCLUDE: excluded = True
+                    elif p < best: best = p
+        return (self.tags[best] if best < len(self.tags) else self.default_topic), excluded
+
+    def topic(self, text):
+        return self.scan(text)[0]
+
+    def excluded(self, text):
+        return self.scan(text)[1]
+
+    def topics(self, texts):
+        """Topik untuk satu batch: teks digabung (pemisah \\x00, tidak ada di kata kunci) dan
+        dipindai sekali; posisi cocok dipetakan balik ke baris."""
+        texts = [(t or "").lower() for t in texts]
+        best = [len(self.tags)] * len(texts)
+        if self._rx is not None and texts:
+            ends, pos = [], 0
+            for t in texts:
+                pos += len(t) + 1; ends.append(pos)
+            for m in self._rx.finditer("\x00".join(texts)):
+                row = bisect_right(ends, m.start())
+                for p in self._hits[m.group(1)]:
+                    if 0 <= p < best[row]: best[row] = p
+        return [self.tags[b] if b < len(self.tags) else self.default_topic for b in best]
+
+    def is_media(self, domain):
+        """Sufiks domain per label lewat trie label terbalik: news.detik.com → com → detik ✓."""
+        node = self._domains
+        for label in reversed((domain or "").lower().split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if "" in node:
+                return True
+        return False
+
+_RULES = None
+_RULES_KEY = None
+def ensure_rules(path=None, exclude=()):
+    """Mesin aturan aktif; dengan argumen → dimuat ulang dari `path` (+ kata exclude tambahan),
+    kecuali file dan daftar exclude sama dengan pemuatan terakhir (crawl berulang di daemon)."""
+    global _RULES, _RULES_KEY
+    if _RULES is None or path is not None or exclude:
+        path = path or RULES_PATH
+        try:
+            key = (path, os.stat(path).st_mtime_ns, tuple(exclude))
+        except OSError:
+            key = None
+        if _RULES is None or key is None or key != _RULES_KEY:
+            _RULES = RuleEngine.load(path, exclude=exclude)
+            _RULES_KEY = key
+    return _RULES
 
 # =========================
-# Geocoding (Nominatim + RateLimiter)
+# Geocoding (Photon paralel + Nominatim 1 req/s)
 # =========================
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-_GEOCODER = Nominatim(user_agent=UA, timeout=20)
-_geocode = RateLimiter(_GEOCODER.geocode, min_delay_seconds=1.1, swallow_exceptions=True)
+class RateBudget:
+    """Jarak minimum antar-panggilan ke satu provider; aman dipakai banyak thread."""
+    def __init__(self, min_interval, name=""):
+        self.name = name
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            t = max(now, self._next)
+            self._next = t + self.min_interval
+        if t > now:
+            time.sleep(t - now)
+            METRICS.inc("ratelimit_sleep_seconds_total", t - now, provider=self.name)
+
+PHOTON_BUDGET = RateBudget(0.1, "photon")
+NOMINATIM_BUDGET = RateBudget(1.1, "nominatim")  # kebijakan Nominatim: maks 1 req/s
+
+# klien dibuat saat pertama dipakai (banyak crawl tidak pernah sampai ke Nominatim)
+_GEOCODER = None
+_HTTP = None
+_CLIENT_LOCK = threading.Lock()
+
+def nominatim():
+    global _GEOCODER
+    with _CLIENT_LOCK:
+        if _GEOCODER is None:
+            from geopy.geocoders import Nominatim
+            kw = {}
+            if NOMINATIM_URL:
+                u = urlparse(NOMINATIM_URL)
+                kw = {"domain": u.netloc + u.path.rstrip("/"), "scheme": u.scheme}
+            _GEOCODER = Nominatim(user_agent=UA, timeout=20, **kw)
+    return _GEOCODER
+
+def http_session():
+    global _HTTP
+    with _CLIENT_LOCK:
+        if _HTTP is None:
+            _HTTP = requests.Session()
+            _HTTP.headers["User-Agent"] = UA
+    return _HTTP
+
+# mode --serve: event loop + klien async yang hidup lintas crawl (lihat Warm); CLI biasa = None
+_WARM = None
+
+@contextmanager
+def warm_scope(args):
+    """Di luar daemon: Warm sementara (loop, klien, process pool) selama blok; di daemon no-op."""
+    global _WARM
+    if _WARM is not None:
+        yield _WARM
+        return
+    _WARM = Warm(args.feed_workers, extract_workers=args.extract_workers)
+    try:
+        yield _WARM
+    finally:
+        _WARM.close()
+        _WARM = None
+
+def run_async(coro):
+    """asyncio.run untuk CLI; di daemon dijalankan di loop bersama supaya klien/pool koneksi tetap hidup."""
+    return _WARM.run(coro) if _WARM is not None else asyncio.run(coro)
+
+def shared_client(kind):
+    """Klien async milik daemon ("feed" / "article"), atau None di luar mode --serve."""
+    return _WARM.clients[kind] if _WARM is not None else None
 
 # =========================
 # Utils dasar
 # =========================
 def gnews_rss(query, when="24h", lang="id", country="ID"):
-    q = quote_plus(query)
-    return f"https://news.google.com/rss/search?q={q}+when:{when}&hl={lang}&gl={country}&ceid={country}:{lang}"
+    q = quote_plus(query) + (f"+when:{when}" if when else "")
+    return f"{GNEWS_BASE}/rss/search?q={q}&hl={lang}&gl={country}&ceid={country}:{lang}"
 
 def parse_date_utc(s: str):
     """Kembalikan ISO 8601 UTC (tz-aware) atau None."""
@@ -91,29 +592,15 @@ def normalize_domain(url: str) -> str:
     return d
 
 def is_indonesian_media(domain: str) -> bool:
-    """Heuristik: TLD .id atau domain media Indonesia populer."""
-    if not domain:
-        return False
-    d = domain.lower()
-    if d.endswith(".id"):
-        return True
-    whitelist = [
-        "kompas.com","detik.com","tempo.co","cnnindonesia.com","cnbcindonesia.com",
-        "liputan6.com","merdeka.com","republika.co.id","antaranews.com","tribunnews.com",
-        "jawapos.com","okezone.com","sindonews.com","kumparan.com","tirto.id","suara.com",
-        "inews.id","medcom.id","viva.co.id","idntimes.com","rmol.id","pikiran-rakyat.com",
-        "beritasatu.com"
-    ]
-    return any(d.endswith(w) for w in whitelist)
+    """Domain .id atau media Indonesia di data/rules.json (media_domains)."""
+    return ensure_rules().is_media(domain)
 
-def extract_locs(text: str):
-    """Gabungkan NER (jika ada) + regex → kandidat lokasi unik (prioritas frasa panjang)."""
-    nlp = ensure_nlp()
-    locs = []
+def _ner_locs(doc):
+    return [e.text.strip() for e in doc.ents if e.label_ in ("LOC","GPE")]
+
+def _merge_locs(ents, text):
+    locs = list(ents)
     if text:
-        if nlp is not None:
-            doc = nlp(text)
-            locs += [e.text.strip() for e in doc.ents if e.label_ in ("LOC","GPE")]
         locs += [m.group(0) for m in ADDR_RE.finditer(text)]
     uniq, seen = [], set()
     for l in locs:
@@ -123,22 +610,49 @@ def extract_locs(text: str):
     uniq.sort(key=lambda x: (-len(x), x))
     return uniq
 
+def extract_locs(text: str):
+    """Gabungkan NER (jika ada) + regex → kandidat lokasi unik (prioritas frasa panjang)."""
+    nlp = ensure_nlp()
+    ents = _ner_locs(nlp(text)) if (text and nlp is not None) else []
+    return _merge_locs(ents, text)
+
+def extract_locs_batch(texts, batch_size=64, n_process=1):
+    """Versi batch extract_locs (satu nlp.pipe untuk semua teks); hasil per teks identik."""
+    texts = list(texts)
+    nlp = ensure_nlp()
+    ents = [[] for _ in texts]
+    if nlp is not None:
+        idx = [i for i, t in enumerate(texts) if t]
+        docs = nlp.pipe((texts[i] for i in idx), batch_size=batch_size, n_process=n_process)
+        for i, doc in zip(idx, docs):
+            ents[i] = _ner_locs(doc)
+    return [_merge_locs(e, t) for e, t in zip(ents, texts)]
+
 def classify_topic(text: str):
-    s = (text or "").lower()
-    if "affan" in s: return "AFFAN"
-    if any(k in s for k in ["polisi","brimob","polda","polres","polresta"]): return "POLISI"
-    if any(k in s for k in ["dpr","parlemen","gedung dpr"]): return "DPR"
-    return "UMUM"
+    return ensure_rules().topic(text)
 
 def geo_priority(q_lower: str):
-    for k, (lat, lon, name) in PRIORITY_PLACES.items():
-        if k in q_lower:
-            return {"lat":lat,"lon":lon,"place_name":name,"geocoder":"priority","score":1.0}
+    """Lookup gazetteer lokal (tanpa jaringan). q_lower boleh berbentuk kunci cache 'kandidat|provinsi'."""
+    return ensure_gazetteer().lookup(q_lower.split("|", 1)[0])
+
+class _GeoError:
+    """Provider gagal menjawab (timeout, 429, 5xx): bukan 'tidak ketemu', jadi tidak di-cache negatif."""
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "GEO_ERROR"
+
+GEO_ERROR = _GeoError()
 
 def geo_photon(q, province=None):
+    """→ hit, None (tidak ketemu), atau GEO_ERROR."""
     try:
         qs = q if not province else f"{q}, {province}"
-        r = requests.get(PHOTON, params={"q":qs,"lang":"id"}, timeout=15, headers={"User-Agent":UA})
+        PHOTON_BUDGET.wait()
+        t0 = time.perf_counter()
+        r = http_session().get(PHOTON, params={"q":qs,"lang":"id"}, timeout=15)
+        METRICS.observe("geocode_request_seconds", time.perf_counter() - t0, provider="photon")
         r.raise_for_status()
         feats = r.json().get("features",[])
         if feats:
@@ -150,12 +664,17 @@ def geo_photon(q, province=None):
                     "kab_kota":p.get("city") or p.get("county"),
                     "provinsi":p.get("state")}
     except Exception:
-        pass
+        METRICS.inc("geocode_errors_total", provider="photon")
+        return GEO_ERROR
 
 def geo_nominatim(q, province=None):
+    """→ hit, None (tidak ketemu), atau GEO_ERROR."""
     try:
         qs = q if not province else f"{q}, {province}"
-        res = _geocode(qs, exactly_one=True, addressdetails=True)
+        NOMINATIM_BUDGET.wait()
+        t0 = time.perf_counter()
+        res = nominatim().geocode(qs, exactly_one=True, addressdetails=True)
+        METRICS.observe("geocode_request_seconds", time.perf_counter() - t0, provider="nominatim")
         if res:
             a=res.raw.get("address",{})
             return {"lat":res.latitude,"lon":res.longitude,"geocoder":"nominatim","score":0.8,
@@ -164,43 +683,635 @@ def geo_nominatim(q, province=None):
                     "kecamatan":a.get("suburb") or a.get("city_district") or a.get("district"),
                     "kab_kota":a.get("city") or a.get("county"),
                     "provinsi":a.get("state")}
+    except Exception:
+        METRICS.inc("geocode_errors_total", provider="nominatim")
+        return GEO_ERROR
+
+class GeoCache:
+    """Cache geocode di SQLite: satu baris per kunci, kedaluwarsa per entri, ditulis per hasil."""
+    def __init__(self, path=GEO_CACHE_PATH, ttl_days=GEO_TTL_DAYS, neg_ttl_hours=GEO_NEG_TTL_HOURS):
+        self.ttl = ttl_days * 86400
+        self.neg_ttl = neg_ttl_hours * 3600
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS geocode ("
+                        "key TEXT PRIMARY KEY, hit TEXT, expires_at REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS geocode_expires ON geocode(expires_at)")
+        self.db.execute("DELETE FROM geocode WHERE expires_at < ?", (time.time(),))
+        self.db.commit()
+        self._import_legacy(os.path.join(os.path.dirname(path), "geocode_cache.json"))
+
+    def _import_legacy(self, json_path):
+        """Sekali jalan: pindahkan hit dari geocode_cache.json lama (entri None dibuang)."""
+        if not os.path.exists(json_path):
+            return
+        if self.db.execute("SELECT 1 FROM geocode LIMIT 1").fetchone():
+            return
+        try:
+            with open(json_path, "r", encoding="utf-8") as f: legacy = json.load(f)
+        except Exception:
+            return
+        exp = time.time() + self.ttl
+        self.db.executemany("INSERT OR IGNORE INTO geocode VALUES (?,?,?)",
+                            [(k, json.dumps(v), exp) for k, v in legacy.items() if v])
+        self.db.commit()
+
+    def get_many(self, keys):
+        """{key: hit} untuk kunci yang masih berlaku; hit None = negatif (tidak ketemu)."""
+        keys = list(dict.fromkeys(keys)); out = {}; now = time.time()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i+500]
+            q = "SELECT key, hit FROM geocode WHERE expires_at >= ? AND key IN (%s)" % ",".join("?"*len(chunk))
+            for k, hit in self.db.execute(q, [now] + chunk):
+                out[k] = json.loads(hit) if hit else None
+        return out
+
+    def put(self, key, hit):
+        exp = time.time() + (self.ttl if hit else self.neg_ttl)
+        self.db.execute("INSERT OR REPLACE INTO geocode VALUES (?,?,?)",
+                        (key, json.dumps(hit) if hit else None, exp))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+def geo_key(cand, province=None):
+    return cand.lower()+("|"+province.lower() if province else "")
+
+def _geo_network(cand, province=None):
+    """Photon lalu Nominatim. None hanya bila keduanya benar-benar menjawab 'tidak ketemu'."""
+    hit = geo_photon(cand, province)
+    if hit:
+        return hit
+    failed = hit is GEO_ERROR
+    hit = geo_nominatim(cand, province)
+    if hit:
+        return hit
+    return GEO_ERROR if failed or hit is GEO_ERROR else None
+
+def geocode_candidates(cands, province=None, cache_path=GEO_CACHE_PATH, workers=4,
+                       ttl_days=GEO_TTL_DAYS, neg_ttl_hours=GEO_NEG_TTL_HOURS):
+    """Resolusi kandidat → hit (atau None). Miss dikerjakan paralel; tiap hasil langsung ditulis ke cache."""
+    cache = GeoCache(cache_path, ttl_days, neg_ttl_hours)
+    try:
+        keys = {cand: geo_key(cand, province) for cand in cands}
+        cached = cache.get_many(keys.values())
+        out, miss = {}, []
+        for cand in cands:
+            key = keys[cand]
+            hit = geo_priority(key)
+            if hit or key in cached:
+                out[cand] = hit or cached[key]
+                METRICS.inc("geocode_lookups_total", source="gazetteer" if hit else
+                            ("cache" if cached[key] else "cache_negative"))
+            else:
+                miss.append(cand)
+        METRICS.inc("geocode_cache_misses_total", len(miss))
+        PROGRESS.update("geocode", 0, len(miss))
+        if miss:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+                futs = {ex.submit(_geo_network, cand, province): cand for cand in miss}
+                try:
+                    for n, f in enumerate(as_completed(futs), start=1):
+                        cand = futs[f]
+                        out[cand] = f.result()
+                        if out[cand] is GEO_ERROR:
+                            out[cand] = None  # tidak di-cache: dicoba lagi di run berikutnya
+                            METRICS.inc("geocode_lookups_total", source="error")
+                        else:
+                            cache.put(keys[cand], out[cand])
+                            METRICS.inc("geocode_lookups_total", source=(out[cand] or {}).get("geocoder") or "not_found")
+                        PROGRESS.update("geocode", n, len(miss))
+                except BaseException:
+                    ex.shutdown(cancel_futures=True)  # batal/galat: jangan habiskan budget untuk sisa miss
+                    raise
+        return out
+    finally:
+        cache.close()
+
+# =========================
+# Wilayah administratif dari koordinat (lokal, massal)
+# =========================
+ADMIN_FIELDS = ("provinsi", "kab_kota", "kecamatan")  # urut dari level teratas
+ADMIN_GRID = 0.25  # sel indeks grid (derajat, ±28 km)
+# nama properti per level di GeoJSON: skema sendiri, GADM (NAME_n), RBI/BIG (WADMxx)
+ADMIN_PROPS = {"provinsi": ("provinsi", "NAME_1", "WADMPR"),
+               "kab_kota": ("kab_kota", "NAME_2", "WADMKK"),
+               "kecamatan": ("kecamatan", "NAME_3", "WADMKC")}
+# tanpa GeoJSON: isi field kosong dari entri gazetteer terdekat dalam radius ini (km)
+ADMIN_NEAREST_KM = {"provinsi": 250, "kab_kota": 40, "kecamatan": 3}
+
+def _in_rings(rings, x, y, max_cells=2_000_000):
+    """Ray casting tervektorisasi (titik × sisi), aturan genap-ganjil atas semua ring (lubang ikut).
+    Titik diproses per blok supaya matriks titik × sisi tetap ≤ max_cells."""
+    inside = np.zeros(len(x), dtype=bool)
+    for ring in rings:
+        x0, y0 = ring[:, 0], ring[:, 1]
+        x1, y1 = np.roll(x0, 1), np.roll(y0, 1)
+        step = max(1, max_cells // len(ring))
+        for a in range(0, len(x), step):
+            xc, yc = x[a:a+step, None], y[a:a+step, None]
+            cross = (y0 > yc) != (y1 > yc)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                xint = x0 + (yc - y0) * (x1 - x0) / (y1 - y0)
+            inside[a:a+step] ^= (cross & (xc < xint)).sum(axis=1) % 2 == 1
+    return inside
+
+class AdminIndex:
+    """Reverse geocode lokal: lat/lon → provinsi/kab_kota/kecamatan untuk banyak titik sekaligus.
+    Dengan GeoJSON batas wilayah: bbox poligon diindeks per sel grid, titik dikelompokkan per sel,
+    lalu diuji point-in-polygon per poligon kandidat (poligon level terdalam menang). Tanpa GeoJSON:
+    entri gazetteer terdekat per level, dalam radius ADMIN_NEAREST_KM (perkiraan)."""
+    def __init__(self, polygons=(), points=()):
+        self.polygons = sorted(polygons, key=lambda p: p[0])  # (level, {field: nama}, bbox, rings)
+        self.grid = {}
+        for k, (_, _, (x0, y0, x1, y1), _) in enumerate(self.polygons):
+            for gx in range(math.floor(x0 / ADMIN_GRID), math.floor(x1 / ADMIN_GRID) + 1):
+                for gy in range(math.floor(y0 / ADMIN_GRID), math.floor(y1 / ADMIN_GRID) + 1):
+                    self.grid.setdefault((gx, gy), []).append(k)
+        self.points = {}  # field → (lat[], lon[], nama[])
+        for f in ADMIN_FIELDS:
+            pts = [(lat, lon, fields) for lat, lon, fields in points if fields.get(f)]
+            if pts:
+                # nama asli untuk ditulis + semua level dalam bentuk casefold untuk dicocokkan dengan baris
+                self.points[f] = (np.array([p[0] for p in pts]), np.array([p[1] for p in pts]),
+                                  np.array([p[2][f] for p in pts], dtype=object),
+                                  {g: np.array([_admin_norm(p[2].get(g)) for p in pts], dtype=object)
+                                   for g in ADMIN_FIELDS})
+
+    @property
+    def exact(self):
+        return bool(self.polygons)
+
+    @classmethod
+    def load(cls, path=ADMIN_PATH):
+        """GeoJSON (Polygon/MultiPolygon) bila ada; selain itu titik-titik gazetteer."""
+        if not path or not os.path.exists(path):
+            gaz = ensure_gazetteer()
+            return cls(points=[(e["lat"], e["lon"], e) for e in gaz.entries])
+        with open(path, "r", encoding="utf-8") as f:
+            features = json.load(f).get("features", [])
+        polygons = []
+        for feat in features:
+            props, geom = feat.get("properties") or {}, feat.get("geometry") or {}
+            fields = {f: next((props[k] for k in keys if props.get(k)), None) for f, keys in ADMIN_PROPS.items()}
+            fields = {f: v for f, v in fields.items() if v}
+            if not fields or geom.get("type") not in ("Polygon", "MultiPolygon"):
+                continue
+            level = max(ADMIN_FIELDS.index(f) for f in fields)
+            parts = geom["coordinates"] if geom["type"] == "MultiPolygon" else [geom["coordinates"]]
+            for part in parts:
+                rings = [np.asarray(r, dtype=float)[:, :2] for r in part if len(r) >= 3]
+                if rings:
+                    outer = rings[0]
+                    bbox = (outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max())
+                    polygons.append((level, fields, bbox, rings))
+        return cls(polygons)
+
+    def lookup(self, lat, lon, known=None):
+        """→ {field: array objek (None = tidak diketahui)} sepanjang lat/lon. known = {field: nilai
+        yang sudah dimiliki tiap titik}; hanya dipakai perkiraan gazetteer supaya hasilnya konsisten."""
+        lat = np.asarray(lat, dtype=float); lon = np.asarray(lon, dtype=float)
+        out = {f: np.full(len(lat), None, dtype=object) for f in ADMIN_FIELDS}
+        ok = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        if not len(ok):
+            return out
+        if self.polygons:
+            gx = np.floor(lon[ok] / ADMIN_GRID).astype(np.int64)
+            gy = np.floor(lat[ok] / ADMIN_GRID).astype(np.int64)
+            cells, inv = np.unique(np.stack([gx, gy], axis=1), axis=0, return_inverse=True)
+            order = np.argsort(inv.ravel(), kind="stable")
+            groups = np.split(ok[order], np.cumsum(np.bincount(inv.ravel()))[:-1])
+            hits = {}  # poligon → indeks titik kandidat (gabungan semua selnya)
+            for (cx, cy), idx in zip(cells.tolist(), groups):
+                for k in self.grid.get((cx, cy), ()):
+                    hits.setdefault(k, []).append(idx)
+            for k in sorted(hits):  # urut level: provinsi → kab_kota → kecamatan
+                _, fields, (x0, y0, x1, y1), rings = self.polygons[k]
+                idx = np.concatenate(hits[k])
+                x, y = lon[idx], lat[idx]
+                idx = idx[(x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)]
+                if len(idx):
+                    idx = idx[_in_rings(rings, lon[idx], lat[idx])]
+                    for f, v in fields.items():
+                        out[f][idx] = v
+            return out
+        # perkiraan, dari atas ke bawah: entri gazetteer terdekat (jarak equirectangular, titik × entri)
+        # yang induknya sama dengan provinsi/kab_kota baris (yang sudah ada atau baru diisi), dan yang
+        # anak-nya sama bila baris sudah punya nama anak yang dikenal gazetteer
+        have = {f: np.array([_admin_norm(v) for v in (known or {}).get(f, [None] * len(lat))], dtype=object)
+                for f in ADMIN_FIELDS}
+        for level, f in enumerate(ADMIN_FIELDS):
+            if f not in self.points:
+                continue
+            plat, plon, names, norm = self.points[f]
+            need = ok[np.array([v is None for v in have[f][ok]], dtype=bool)]
+            if not len(need):
+                continue
+            dy = lat[need, None] - plat[None, :]
+            dx = (lon[need, None] - plon[None, :]) * np.cos(np.radians(lat[need, None]))
+            d = np.hypot(dx, dy) * 111.32
+            for g in ADMIN_FIELDS:
+                if g == f:
+                    continue
+                rv = have[g][need]
+                use = np.array([v is not None for v in rv], dtype=bool)
+                if ADMIN_FIELDS.index(g) > level:  # anak: hanya bila namanya dikenal
+                    use &= np.isin(rv, norm[g][norm[g] != None])
+                d[use[:, None] & (rv[:, None] != norm[g][None, :])] = np.inf
+            near = d.argmin(axis=1)
+            within = d[np.arange(len(need)), near] <= ADMIN_NEAREST_KM[f]
+            out[f][need[within]] = names[near[within]]
+            have[f][need[within]] = norm[f][near[within]]
+        return out
+
+def _admin_norm(v):
+    return v.casefold() if isinstance(v, str) and v else None
+
+_ADMIN = None
+_ADMIN_KEY = None
+def ensure_admin(path=None):
+    """Indeks wilayah aktif; dimuat ulang hanya bila path/mtime file berubah (daemon memakai ulang)."""
+    global _ADMIN, _ADMIN_KEY
+    if _ADMIN is None or path is not None:
+        path = path or ADMIN_PATH
+        key = (path, os.stat(path).st_mtime_ns if os.path.exists(path) else None)
+        if _ADMIN is None or key != _ADMIN_KEY:
+            try:
+                _ADMIN = AdminIndex.load(path)
+            except Exception:
+                _ADMIN = AdminIndex()
+            _ADMIN_KEY = key
+    return _ADMIN
+
+def fill_admin(rows):
+    """Lengkapi kecamatan/kab_kota/provinsi semua baris berkoordinat dalam satu lookup lokal.
+    Batas poligon = sumber acuan (menimpa hasil geocoder, supaya nama wilayah konsisten);
+    perkiraan gazetteer hanya mengisi field yang kosong, selaras dengan field yang sudah ada."""
+    rows = [r for r in rows if r.get("lat") is not None and r.get("lon") is not None]
+    if not rows:
+        return
+    index = ensure_admin()
+    with METRICS.stage("admin"):
+        found = index.lookup([r["lat"] for r in rows], [r["lon"] for r in rows],
+                             known={f: [r.get(f) for r in rows] for f in ADMIN_FIELDS})
+        for f in ADMIN_FIELDS:
+            for r, v in zip(rows, found[f]):
+                if v is None or v == r.get(f):
+                    continue
+                if not r.get(f):
+                    METRICS.inc("admin_filled_total", level=f)
+                elif index.exact:
+                    METRICS.inc("admin_corrected_total", level=f)
+                else:
+                    continue
+                r[f] = v
+
+# =========================
+# Fetch feed RSS paralel + conditional GET (ETag/Last-Modified)
+# =========================
+def _feed_state_paths(state_dir, url):
+    h = hashlib.md5(url.encode()).hexdigest()
+    return os.path.join(state_dir, h + ".json"), os.path.join(state_dir, h + ".xml")
+
+def _load_feed_state(state_dir, url):
+    """Kembalikan (meta, body) feed terakhir yang tersimpan, atau ({}, None)."""
+    if not state_dir:
+        return {}, None
+    meta_p, body_p = _feed_state_paths(state_dir, url)
+    try:
+        with open(meta_p, "r", encoding="utf-8") as f: meta = json.load(f)
+        with open(body_p, "rb") as f: body = f.read()
+        return meta, body
+    except Exception:
+        return {}, None
+
+def _save_feed_state(state_dir, url, meta, body):
+    if not state_dir:
+        return
+    meta_p, body_p = _feed_state_paths(state_dir, url)
+    try:
+        os.makedirs(state_dir, exist_ok=True)
+        # body dulu, baru meta: meta tanpa body tidak pernah dipakai untuk revalidasi
+        with open(body_p + ".tmp", "wb") as f: f.write(body)
+        os.replace(body_p + ".tmp", body_p)
+        with open(meta_p + ".tmp", "w", encoding="utf-8") as f: json.dump(meta, f)
+        os.replace(meta_p + ".tmp", meta_p)
     except Exception:
         pass
 
-def geocode_candidates(cands, province=None, cache_path="geocode_cache.json"):
-    cache={}
-    if os.path.exists(cache_path):
-        try: cache=json.load(open(cache_path,"r",encoding="utf-8"))
-        except Exception: cache={}
-    out={}
-    for cand in cands:
-        key=cand.lower()+("|"+province.lower() if province else "")
-        if key in cache:
-            out[cand]=cache[key]; continue
-        hit = geo_priority(key) or geo_photon(cand, province) or geo_nominatim(cand, province)
-        out[cand]=hit; cache[key]=hit
-        time.sleep(0.1)
-    try: json.dump(cache, open(cache_path,"w",encoding="utf-8"))
-    except Exception: pass
-    return out
+def feed_client(max_concurrency=8):
+    """AsyncClient bersama (pool koneksi) untuk semua feed dalam satu crawl."""
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    return httpx.AsyncClient(follow_redirects=True, headers={"User-Agent":UA}, limits=limits, timeout=20)
+
+@asynccontextmanager
+async def feed_session(max_concurrency=8):
+    """Klien feed untuk satu crawl: milik daemon bila ada, selain itu dibuat lalu ditutup."""
+    client = shared_client("feed")
+    if client is not None:
+        yield client
+        return
+    async with feed_client(max_concurrency) as client:
+        yield client
+
+async def fetch_feeds(feed_urls, client, sem, state_dir=FEED_STATE_DIR):
+    """Unduh beberapa feed sekaligus; 304 → pakai isi tersimpan. Urutan hasil = urutan feed_urls."""
+    async def one(u):
+        meta, cached = _load_feed_state(state_dir, u)
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(u, headers=headers)
+                METRICS.observe("feed_request_seconds", time.perf_counter() - t0)
+                if r.status_code == 304 and cached is not None:
+                    METRICS.inc("feeds_fetched_total", status="not_modified")
+                    return cached
+                r.raise_for_status()
+            except Exception:
+                METRICS.inc("feeds_fetched_total", status="error")
+                return b""
+        METRICS.inc("feeds_fetched_total", status="ok")
+        body = r.content
+        if r.headers.get("etag") or r.headers.get("last-modified"):
+            _save_feed_state(state_dir, u, {"etag": r.headers.get("etag"),
+                                            "last_modified": r.headers.get("last-modified")}, body)
+        return body
+    bodies = await asyncio.gather(*[one(u) for u in feed_urls])
+    # gagal/kosong ditandai `failed`: bukan hasil query, jangan masuk statistik yield
+    return [feedparser.parse(b) if b else feedparser.FeedParserDict(entries=[], failed=True) for b in bodies]
+
+# =========================
+# URL kanonis untuk link redirect Google News
+# =========================
+_GNEWS_ARTICLE_RE = re.compile(r"/(?:rss/)?articles/([A-Za-z0-9_-]+)")
+
+class UrlCache:
+    """redirect → URL kanonis di SQLite; kanonis NULL = gagal resolve (kedaluwarsa lebih cepat)."""
+    def __init__(self, path=URL_CACHE_PATH, ttl_days=URL_TTL_DAYS, neg_ttl_hours=URL_NEG_TTL_HOURS):
+        self.ttl = ttl_days * 86400
+        self.neg_ttl = neg_ttl_hours * 3600
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS redirects ("
+                        "url TEXT PRIMARY KEY, canonical TEXT, expires_at REAL NOT NULL)")
+        self.db.execute("DELETE FROM redirects WHERE expires_at < ?", (time.time(),))
+        self.db.commit()
+
+    def get_many(self, urls):
+        """{url: kanonis} untuk entri yang masih berlaku; kanonis None = negatif."""
+        urls = list(dict.fromkeys(urls)); out = {}; now = time.time()
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i+500]
+            q = "SELECT url, canonical FROM redirects WHERE expires_at >= ? AND url IN (%s)" % ",".join("?"*len(chunk))
+            out.update(self.db.execute(q, [now] + chunk))
+        return out
+
+    def put_many(self, pairs):
+        now = time.time()
+        self.db.executemany("INSERT OR REPLACE INTO redirects VALUES (?,?,?)",
+                            [(u, c, now + (self.ttl if c else self.neg_ttl)) for u, c in pairs])
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+def is_gnews_redirect(url: str) -> bool:
+    u = urlparse(url or "")
+    return u.netloc == urlparse(GNEWS_BASE).netloc and bool(_GNEWS_ARTICLE_RE.search(u.path))
+
+def _varint(buf, i):
+    n = shift = 0
+    while True:
+        b = buf[i]; i += 1
+        n |= (b & 0x7F) << shift; shift += 7
+        if not b & 0x80:
+            return n, i
+
+def decode_gnews_url(url: str):
+    """Id artikel format lama (CBMi…) = protobuf base64 yang memuat URL penerbit → URL itu, tanpa jaringan.
+    Format baru (AU_yqL…) tidak memuat URL → None."""
+    m = _GNEWS_ARTICLE_RE.search(urlparse(url).path)
+    if not m:
+        return None
+    s = m.group(1)
+    try:
+        buf = base64.urlsafe_b64decode(s + "=" * (-len(s) % 4)); i = 0
+        while i < len(buf):
+            key, i = _varint(buf, i)
+            if key & 7 == 0:
+                _, i = _varint(buf, i)
+            elif key & 7 == 2:
+                n, i = _varint(buf, i)
+                field = buf[i:i+n]; i += n
+                if field.startswith((b"http://", b"https://")):
+                    return field.decode("utf-8")
+            else:
+                return None
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+    return None
+
+async def _resolve_redirect(client, u):
+    """Ikuti redirect; hanya header yang dibaca (isi tidak diunduh). Masih di Google News → None."""
+    t0 = time.perf_counter()
+    try:
+        async with client.stream("GET", u, timeout=15) as r:
+            final = str(r.url)
+    except Exception:
+        return None
+    finally:
+        METRICS.observe("url_resolve_seconds", time.perf_counter() - t0)
+    return None if is_gnews_redirect(final) else final
+
+class ResolveBudget:
+    """Batas resolve redirect lewat jaringan untuk satu crawl: semaphore sendiri, kuota total, dan
+    berhenti bila `probe` percobaan pertama tidak menghasilkan redirect (link CBMi… menjawab 200
+    dengan halaman interstitial, jadi tiap percobaan hanya membebani host feed)."""
+    def __init__(self, limit=URL_RESOLVE_MAX, probe=URL_RESOLVE_PROBE, concurrency=URL_RESOLVE_CONCURRENCY):
+        self.left = limit
+        self.probe = probe
+        self.tried = self.ok = 0
+        self.sem = asyncio.Semaphore(max(1, concurrency))
+
+    def take(self):
+        if self.left <= 0 or (self.tried >= self.probe and not self.ok):
+            return False
+        self.left -= 1
+        return True
+
+    def record(self, ok):
+        self.tried += 1
+        self.ok += bool(ok)
+
+async def resolve_links(links, client, budget=None, cache=None):
+    """link → URL kanonis. Bukan redirect Google News → dirinya sendiri; redirect: cache → decode id →
+    request (dalam batas `budget`). Gagal/di luar budget → link asli (tetap bisa dipakai, domain diambil
+    dari metadata source feed); yang di luar budget tidak di-cache."""
+    budget = budget or ResolveBudget()
+    out = {}; todo = []; new = []
+    redirects = [u for u in dict.fromkeys(links) if is_gnews_redirect(u)]
+    cached = cache.get_many(redirects) if cache is not None else {}
+    for u in redirects:
+        if u in cached:
+            out[u] = cached[u]; METRICS.inc("url_resolve_total", via="cache")
+        else:
+            c = decode_gnews_url(u)
+            if c:
+                out[u] = c; new.append((u, c)); METRICS.inc("url_resolve_total", via="decode")
+            else:
+                todo.append(u)
+
+    async def one(u):
+        async with budget.sem:
+            PROGRESS.check()
+            if not budget.take():
+                return u, False
+            c = await _resolve_redirect(client, u)
+            budget.record(c)
+            return u, c
+    for u, c in await asyncio.gather(*[one(u) for u in todo]):
+        if c is False:
+            METRICS.inc("url_resolve_total", via="skipped")
+            continue
+        out[u] = c; new.append((u, c))
+        METRICS.inc("url_resolve_total", via="network" if c else "failed")
+    if cache is not None and new:
+        cache.put_many(new)
+    return {u: out.get(u) or u for u in links}
 
 # =========================
 # Fetch HTML paralel (untuk mode 'full')
 # =========================
-async def fetch_html(urls, mode="fast", max_concurrency=12):
+FETCH_PER_HOST = 4          # permintaan paralel maks. per host
+FETCH_HOST_INTERVAL = 0.2   # jeda minimum antar-permintaan ke host yang sama (detik)
+FETCH_RETRIES = 2           # percobaan ulang untuk error sementara
+FETCH_BACKOFF = 0.5         # dasar backoff eksponensial (detik), dengan jitter
+FETCH_MAX_BYTES = 3_000_000 # isi lebih besar dipotong (kepala halaman memuat artikelnya)
+FETCH_RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+FETCH_HTML_TYPES = {"", "text/html", "application/xhtml+xml"}
+
+class ArticleFetcher:
+    """Pengunduh artikel: batas per host + jeda sopan, retry dengan backoff berjitter, HTTP/2 bila h2
+    terpasang, baca streaming dengan batas byte, batal dini untuk content-type non-HTML.
+    gzip/deflate (dan brotli bila paket brotli terpasang) didekode httpx.
+    Latensi & hasil per host dicatat ke METRICS (label host)."""
+    def __init__(self, max_concurrency=12, per_host=FETCH_PER_HOST, host_interval=FETCH_HOST_INTERVAL,
+                 retries=FETCH_RETRIES, max_bytes=FETCH_MAX_BYTES, timeout=25):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.host_interval = host_interval
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._hosts = {}  # host → [Semaphore, waktu loop paling awal untuk permintaan berikutnya]
+        self.client = None
+        self._owned = False
+
+    def new_client(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        return httpx.AsyncClient(follow_redirects=True, headers={"User-Agent": UA}, limits=limits,
+                                 timeout=httpx.Timeout(self.timeout, connect=10),
+                                 http2=find_spec("h2") is not None)
+
+    async def __aenter__(self):
+        # di daemon koneksi (dan sesi HTTP/2) ke situs berita dipakai ulang lintas crawl
+        self.client = shared_client("article")
+        self._owned = self.client is None
+        if self._owned:
+            self.client = self.new_client()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._owned:
+            await self.client.aclose()
+
+    def _host(self, host):
+        h = self._hosts.get(host)
+        if h is None:
+            h = self._hosts[host] = [asyncio.Semaphore(self.per_host), 0.0]
+        return h
+
+    async def _polite(self, h):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        wait = h[1] - now
+        h[1] = max(now, h[1]) + self.host_interval  # slot dipesan tanpa await → urut, tanpa lock
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _get(self, u, host):
+        """→ (html, hasil, retry_after). hasil: ok / truncated / non_html / http_4xx / retry."""
+        t0 = time.perf_counter()
+        try:
+            async with self.client.stream("GET", u) as r:
+                if r.status_code in FETCH_RETRY_STATUS:
+                    ra = r.headers.get("retry-after", "")
+                    return "", "retry", float(ra) if ra.isdigit() else None
+                if r.status_code >= 400:
+                    return "", f"http_{r.status_code}", None
+                ctype = r.headers.get("content-type", "").split(";")[0].strip().lower()
+                if ctype not in FETCH_HTML_TYPES:
+                    return "", "non_html", None
+                buf = bytearray(); outcome = "ok"
+                async for chunk in r.aiter_bytes():
+                    buf += chunk
+                    if len(buf) >= self.max_bytes:
+                        del buf[self.max_bytes:]; outcome = "truncated"
+                        break
+                METRICS.inc("article_fetch_bytes_total", len(buf))
+                try:
+                    html = buf.decode(r.encoding or "utf-8", errors="replace")
+                except LookupError:
+                    html = buf.decode("utf-8", errors="replace")
+                return html, outcome, None
+        except httpx.TransportError:
+            return "", "retry", None
+        except Exception:
+            return "", "error", None
+        finally:
+            METRICS.observe("article_fetch_seconds", time.perf_counter() - t0, host=host)
+
+    async def fetch(self, u, deliver=None):
+        """→ HTML ("" bila gagal). `deliver` (async, opsional) dipanggil dengan HTML selagi slot global
+        masih dipegang, untuk backpressure pipeline. Slot per host diambil lebih dulu, jadi host yang
+        lambat hanya menahan slotnya sendiri; backoff dijalankan di luar kedua slot."""
+        host = urlparse(u).netloc.lower()
+        h = self._host(host)
+        for attempt in range(self.retries + 1):
+            async with h[0]:
+                await self._polite(h)
+                async with self._sem:
+                    html, outcome, retry_after = await self._get(u, host)
+                    if outcome != "retry" or attempt == self.retries:
+                        METRICS.inc("article_fetch_total", host=host, outcome="failed" if outcome == "retry" else outcome)
+                        if deliver is not None:
+                            await deliver(html)
+                        return html
+            METRICS.inc("article_fetch_retries_total", host=host)
+            backoff = FETCH_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+            await asyncio.sleep(min(30.0, max(retry_after or 0.0, backoff)))
+
+async def fetch_html(urls, mode="fast", max_concurrency=12, **fetcher_opts):
     if mode=="fast":
         return {u:"" for u in urls}
-    sem = asyncio.Semaphore(max_concurrency)
-    async with httpx.AsyncClient(follow_redirects=True, headers={"User-Agent":UA}) as client:
-        async def one(u):
-            async with sem:
-                try:
-                    r=await client.get(u, timeout=25); r.raise_for_status()
-                    return u,r.text
-                except Exception:
-                    return u,""
-        res=await asyncio.gather(*[one(u) for u in urls])
-        return dict(res)
+    async with ArticleFetcher(max_concurrency, **fetcher_opts) as fetcher:
+        res=await asyncio.gather(*[fetcher.fetch(u) for u in urls])
+    return dict(zip(urls, res))
+
+@contextmanager
+def extract_pool(n_workers):
+    """Process pool trafilatura: milik daemon bila ada (worker tetap hangat), selain itu sekali pakai."""
+    if _WARM is not None:
+        yield _WARM.extract_pool(n_workers)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        yield pool
 
 def extract_text(html, url):
     if not html: return ""
@@ -209,6 +1320,49 @@ def extract_text(html, url):
     except Exception:
         return ""
 
+async def fetch_extract(urls, max_concurrency=12, extract_workers=None, queue_size=32, **fetcher_opts):
+    """Pipeline unduh → ekstrak: tiap HTML langsung dikirim ke process pool trafilatura lalu dibuang.
+    HTML di memori paling banyak max_concurrency + queue_size halaman. Kembalikan {url: teks}.
+    fetcher_opts diteruskan ke ArticleFetcher (per_host, retries, max_bytes, ...)."""
+    texts = {u: "" for u in urls}
+    if not urls:
+        return texts
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(maxsize=max(1, queue_size))
+    n_workers = extract_workers or os.cpu_count() or 1
+    done = [0]
+    PROGRESS.update("extract", 0, len(urls))
+    with extract_pool(n_workers) as pool:
+        async def consumer():
+            while True:
+                u, html = await pending.get()
+                try:
+                    if html:
+                        texts[u] = await loop.run_in_executor(pool, extract_text, html, u)
+                except Exception:
+                    pass
+                finally:
+                    pending.task_done()
+                    done[0] += 1
+                    with suppress(CrawlCancelled):  # pembatalan diteruskan lewat producer
+                        PROGRESS.update("extract", done[0], len(urls))
+
+        async with ArticleFetcher(max_concurrency, **fetcher_opts) as fetcher:
+            async def producer(u):
+                async def deliver(html):
+                    PROGRESS.check()
+                    await pending.put((u, html))  # slot unduhan ditahan sampai antrean punya ruang
+                await fetcher.fetch(u, deliver)
+
+            consumers = [asyncio.create_task(consumer()) for _ in range(n_workers)]
+            producers = [asyncio.create_task(producer(u)) for u in urls]
+            try:
+                await asyncio.gather(*producers)
+                await pending.join()
+            finally:
+                for t in producers + consumers: t.cancel()
+    return texts
+
 # =========================
 # Build query wilayah: "demo {Provinsi} OR demo {Kota(,Kota2,...)}"
 # =========================
@@ -275,102 +1429,360 @@ def build_wide_queries():
     return BASE_WIDE_TOPICS + build_region_queries()
 
 # =========================
-# Main
+# Perencana query: riwayat yield per query → urutan, lewati yang sepi, pecah yang jenuh
 # =========================
-def main():
-    ap=argparse.ArgumentParser()
-    ap.add_argument("--include", required=True, help="comma-separated keywords include")
-    ap.add_argument("--exclude", default="", help="comma-separated keywords exclude (title only)")
-    ap.add_argument("--when", default="24h", help="12h/24h/48h/72h/7d")
-    ap.add_argument("--province", default=None, help="bias geocode ke provinsi (mis. 'DKI Jakarta')")
-    ap.add_argument("--mode", default="fast", choices=["fast","full"], help="fast=judul saja, full=unduh isi artikel")
-    ap.add_argument("--out", default="demo_out.csv", help="output CSV path")
-    ap.add_argument("--id-media-only", action="store_true", help="Hanya ambil artikel dari media Indonesia")
-    # fitur multi-feed
-    ap.add_argument("--target", type=int, default=500, help="target jumlah artikel (perkiraan)")
-    ap.add_argument("--wide", action="store_true", help="gunakan paket query luas (topik+seluruh provinsi/kota)")
-    ap.add_argument("--queries", default="", help="tambahan query kustom, pisahkan koma")
-    args=ap.parse_args()
+SATURATION_RATIO = 0.9      # entri ≥ 90% kapasitas feed → hasil kemungkinan terpotong
+QUERY_SPLIT_MIN_NEW = 0.1  # feed jenuh dipecah hanya bila ≥10% entrinya baru
+QUERY_EMA = 0.5             # bobot run terbaru pada rata-rata bergerak
+QUERY_PRIOR_NEW = MAX_PER_FEED / 2  # perkiraan untuk query tanpa riwayat (dicoba sebelum yang terbukti sepi)
+QUERY_SKIP_BELOW = 0.5      # rata-rata entri baru < ini setelah ≥3 run → dilewati...
+QUERY_REPROBE_HOURS = 24    # ...kecuali terakhir dicoba lebih lama dari ini
 
-    # siapkan daftar query
-    include_terms = [x.strip() for x in args.include.split(",") if x.strip()]
-    base_core     = ["dpr","parlemen","gedung dpr","polisi","polda","polres","brimob","affan"]
-    base_query    = " OR ".join(f"({k})" for k in (include_terms + base_core))
+class QueryStats:
+    """Per kunci rencana (query|when[|hari]): jumlah run + EMA entri baru, rasio terbuang, rasio jenuh."""
+    def __init__(self, path=QUERY_STATS_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS query_stats (key TEXT PRIMARY KEY, runs INTEGER NOT NULL, "
+                        "ema_new REAL NOT NULL, ema_waste REAL NOT NULL, ema_sat REAL NOT NULL, last_run REAL NOT NULL)")
+        self.stats = {k: {"runs": runs, "ema_new": n, "ema_waste": w, "ema_sat": sat, "last_run": t}
+                      for k, runs, n, w, sat, t in self.db.execute("SELECT * FROM query_stats")}
 
-    queries = [base_query]
-    if args.wide:
-        queries.extend(build_wide_queries())
-    if args.queries.strip():
-        queries.extend([q.strip() for q in args.queries.split(",") if q.strip()])
-    # dedup
-    queries = list(dict.fromkeys(queries))
+    def get(self, key):
+        return self.stats.get(key)
 
-    rows=[]; urls=[]; seen_links=set()
-    exc=[x.strip().lower() for x in args.exclude.split(",") if x.strip()]
+    def record(self, key, entries, new):
+        """entries = item di feed, new = baris unik yang ditambahkan query ini."""
+        waste = (entries - new) / entries if entries else 1.0
+        sat = 1.0 if entries >= SATURATION_RATIO * MAX_PER_FEED else 0.0
+        old = self.stats.get(key)
+        if old is None:
+            st = {"runs": 1, "ema_new": float(new), "ema_waste": waste, "ema_sat": sat}
+        else:
+            ema = lambda prev, x: (1 - QUERY_EMA) * prev + QUERY_EMA * x
+            st = {"runs": old["runs"] + 1, "ema_new": ema(old["ema_new"], new),
+                  "ema_waste": ema(old["ema_waste"], waste), "ema_sat": ema(old["ema_sat"], sat)}
+        st["last_run"] = time.time()
+        self.stats[key] = st
+        self.db.execute("INSERT OR REPLACE INTO query_stats VALUES (?,?,?,?,?,?)",
+                        (key, st["runs"], st["ema_new"], st["ema_waste"], st["ema_sat"], st["last_run"]))
+        self.db.commit()
 
-    # estimasi feed yang dibutuhkan
-    need_feeds = max(1, math.ceil(args.target / MAX_PER_FEED))
+    def close(self):
+        self.db.close()
 
-    for qi, q in enumerate(queries, start=1):
-        if len(rows) >= args.target: break
-        feed_url = gnews_rss(q, when=args.when)
-        d = feedparser.parse(feed_url)
+# item rencana = (query, when, hari): hari None → when relatif ("24h"); hari k → jendela 1 hari, k hari lalu
+def plan_key(item):
+    q, when, day = item
+    return f"{q}|{when}" + (f"|d{day}" if day is not None else "")
 
-        for e in d.entries:
-            if len(rows) >= args.target: break
-            title = getattr(e, "title", "") or ""
-            link  = getattr(e, "link", "") or ""
-            if not link or link in seen_links:
-                continue
+def plan_feed_url(item):
+    q, when, day = item
+    if day is None:
+        return gnews_rss(q, when=when)
+    d = datetime.now(UTC).date() - timedelta(days=day)
+    return gnews_rss(f"{q} after:{d} before:{d + timedelta(days=1)}", when=None)
+
+def split_item(item):
+    """Query jenuh → query lebih sempit: per suku OR (sub-wilayah/sub-topik), lalu per hari bila --when ≥ 2 hari."""
+    q, when, day = item
+    if day is not None:
+        return []
+    parts = list(dict.fromkeys(p.strip() for p in q.split(" OR ") if p.strip()))
+    if len(parts) > 1:
+        return [(p, when, None) for p in parts]
+    span = parse_when(when)
+    if span < timedelta(days=2):
+        return []
+    # semua hari kalender UTC yang disentuh jendela [now - when, now], termasuk hari terlama yang terpotong
+    now = datetime.now(UTC)
+    return [(q, when, d) for d in range((now.date() - (now - span).date()).days + 1)]
 
-            domain = normalize_domain(link)
-            if args.id_media_only and not is_indonesian_media(domain):
+def expected_new(stats, item):
+    """Perkiraan entri baru dari satu item rencana (EMA riwayat, atau prior untuk query baru)."""
+    st = stats.get(plan_key(item))
+    return st["ema_new"] if st else QUERY_PRIOR_NEW
+
+def plan_queries(queries, when, stats):
+    """Urutan eksekusi. Query yang biasanya jenuh langsung diganti pecahannya; yang terbukti sepi
+    dilewati (dicoba ulang tiap QUERY_REPROBE_HOURS); sisanya urut perkiraan entri baru.
+    Query pertama (kata kunci pengguna) dan pecahannya tidak pernah dilewati dan tetap di depan."""
+    now = time.time(); planned = []
+    for idx, q in enumerate(queries):
+        item = (q, when, None); st = stats.get(plan_key(item))
+        subs = split_item(item) if st and st["ema_sat"] >= 0.5 else []
+        for it in subs or [item]:
+            st = stats.get(plan_key(it))
+            if (idx != 0 and st and st["runs"] >= 3 and st["ema_new"] < QUERY_SKIP_BELOW
+                    and now - st["last_run"] < QUERY_REPROBE_HOURS * 3600):
+                METRICS.inc("query_skipped_total")
                 continue
-            if any(x in title.lower() for x in exc):
+            planned.append((idx != 0, -expected_new(stats, it), len(planned), it))
+    return [it for *_, it in sorted(planned)]
+
+# =========================
+# Kumpulkan entri feed → rows
+# =========================
+async def collect_rows(queries, args):
+    """Ambil feed per gelombang (paralel) menurut rencana query, gabungkan entri.
+    Link redirect Google News diganti URL kanonis penerbit sebelum dedup & filter domain;
+    query yang jenuh dipecah di tempat. → (rows, jumlah feed yang diminta)"""
+    rows=[]; seen_links=set(); n_feeds=0
+    wave = max(1, args.feed_workers)
+    sem = asyncio.Semaphore(wave)
+    url_cache = UrlCache(args.url_cache)
+    resolve_budget = ResolveBudget()
+    stats = QueryStats(args.query_stats)
+    rules = ensure_rules()
+    plan = deque(plan_queries(queries, args.when, stats))
+    try:
+        async with feed_session(wave) as client:
+            while plan and len(rows) < args.target:
+                # gelombang berisi feed secukupnya: berhenti menambah begitu perkiraan entri baru
+                # menutup sisa target (maks. --feed-workers feed)
+                batch = []; expect = 0.0; need = args.target - len(rows)
+                while plan and len(batch) < wave and expect < need:
+                    batch.append(plan.popleft()); expect += expected_new(stats, batch[-1])
+                feeds = await fetch_feeds([plan_feed_url(it) for it in batch], client, sem)
+                n_feeds += len(batch)
+                PROGRESS.update("feeds", n_feeds, n_feeds + len(plan))
+
+                # saring murah dulu (judul, domain dari <source> feed), baru resolve link yang lolos
+                cands = []
+                for it, d in zip(batch, feeds):
+                    METRICS.inc("query_entries_total", len(d.entries), query=it[0])
+                    for e in d.entries:
+                        METRICS.inc("entries_seen_total")
+                        title = getattr(e, "title", "") or ""
+                        link  = getattr(e, "link", "") or ""
+                        src_domain = normalize_domain((getattr(e, "source", None) or {}).get("href", ""))
+                        if not link:
+                            METRICS.inc("entries_skipped_total", reason="no_link")
+                            continue
+                        if rules.excluded(title):
+                            METRICS.inc("entries_filtered_total", reason="exclude")
+                            continue
+                        if args.id_media_only and src_domain and not rules.is_media(src_domain):
+                            METRICS.inc("entries_filtered_total", reason="non_id_media")
+                            continue
+                        cands.append((it, e, title, link, src_domain))
+
+                # resolve per potongan seukuran sisa target, supaya tidak me-resolve entri yang tak terpakai
+                new_per_item = Counter(); unseen = Counter(c[0] for c in cands); i = 0
+                while i < len(cands) and len(rows) < args.target:
+                    part = cands[i:i + max(32, args.target - len(rows))]; i += len(part)
+                    PROGRESS.check()
+                    canon = await resolve_links([c[3] for c in part], client, resolve_budget, url_cache)
+                    for it, e, title, link, src_domain in part:
+                        if len(rows) >= args.target: break
+                        unseen[it] -= 1
+                        url = canon[link]
+                        if url in seen_links:
+                            METRICS.inc("entries_deduped_total")
+                            continue
+                        domain = src_domain if is_gnews_redirect(url) else normalize_domain(url)
+                        if args.id_media_only and not rules.is_media(domain):
+                            METRICS.inc("entries_filtered_total", reason="non_id_media")
+                            continue
+
+                        seen_links.add(url)
+                        published = getattr(e,"published","") or getattr(e,"updated","")
+                        rows.append({
+                            "id": hashlib.md5(url.encode()).hexdigest(),
+                            "title": title,
+                            "source_url": url,
+                            "source_domain": domain,
+                            "published_at_utc": parse_date_utc(published),
+                            "q_src": it[0]
+                        })
+                        new_per_item[it] += 1
+
+                for it, d in zip(batch, feeds):
+                    METRICS.inc("query_new_total", new_per_item[it], query=it[0])
+                    if unseen[it] > 0 or d.get("failed"):
+                        continue  # terpotong --target / gagal diunduh: yield-nya tidak representatif
+                    stats.record(plan_key(it), len(d.entries), new_per_item[it])
+                    # jenuh dan masih menyumbang entri baru → kemungkinan ada yang terpotong; pecah
+                    if (len(d.entries) >= SATURATION_RATIO * MAX_PER_FEED and len(rows) < args.target
+                            and new_per_item[it] >= QUERY_SPLIT_MIN_NEW * len(d.entries)):
+                        subs = split_item(it)
+                        if subs:
+                            METRICS.inc("query_splits_total")
+                            plan.extendleft(reversed(subs))
+    finally:
+        url_cache.close(); stats.close()
+    return rows, n_feeds
+
+# =========================
+# Klaster near-duplicate (MinHash + LSH): berita sindikasi di banyak domain
+# =========================
+CLUSTER_JACCARD = 0.8      # kemiripan minimum (Jaccard kata judul / shingle isi)
+_MH_BANDS, _MH_ROWS = 8, 4  # 32 fungsi hash; pasangan J=0.8 jadi kandidat dengan peluang ~98%
+# fungsi hash ke-i = blake2b(fitur) XOR salt ke-i (jauh lebih murah daripada (a*h+b) mod p di Python)
+_MH_SALTS = [int(hashlib.md5(f"minhash-{i}".encode()).hexdigest()[:16], 16) for i in range(_MH_BANDS * _MH_ROWS)]
+_TITLE_SOURCE_RE = re.compile(r"\s+[-–|]\s+[^-–|]{2,60}$")  # akhiran " - Nama Media" dari Google News
+_WORD_RE = re.compile(r"\w+")
+
+def title_tokens(title):
+    return set(_WORD_RE.findall(_TITLE_SOURCE_RE.sub("", title or "").lower()))
+
+def body_shingles(text, n=3):
+    w = _WORD_RE.findall((text or "").lower())
+    return {" ".join(w[i:i+n]) for i in range(len(w)-n+1)} if len(w) >= n else set(w)
+
+def minhash(features):
+    hs = [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big") for f in features]
+    if not hs:
+        return None
+    return tuple(min(h ^ salt for h in hs) for salt in _MH_SALTS)
+
+def near_dup_roots(feature_sets, threshold=CLUSTER_JACCARD, keys=None):
+    """Indeks → indeks wakil klaster (anggota pertama). Kandidat dari band MinHash, lalu dicek
+    dengan Jaccard sebenarnya; bila `keys` diberikan, hanya item dengan key sama yang digabung."""
+    parent = list(range(len(feature_sets)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]; i = parent[i]
+        return i
+    buckets = {}
+    for i, fs in enumerate(feature_sets):
+        sig = minhash(fs)
+        if sig is None:
+            continue
+        cands = set()
+        for b in range(_MH_BANDS):
+            bucket = buckets.setdefault((b, sig[b*_MH_ROWS:(b+1)*_MH_ROWS]), [])
+            cands.update(bucket); bucket.append(i)
+        for j in sorted(cands):
+            ri, rj = find(i), find(j)
+            if ri == rj or (keys is not None and keys[i] != keys[j]):
                 continue
+            other = feature_sets[j]
+            if len(fs & other) / len(fs | other) >= threshold:
+                parent[max(ri, rj)] = min(ri, rj)
+    return [find(i) for i in range(len(feature_sets))]
 
-            seen_links.add(link)
-            published = getattr(e,"published","") or getattr(e,"updated","")
-            rows.append({
-                "id": hashlib.md5(link.encode()).hexdigest(),
-                "title": title,
-                "source_url": link,
-                "source_domain": domain,
-                "published_at_utc": parse_date_utc(published),
-                "q_src": q
-            })
-            urls.append(link)
+# kolom hasil olahan wakil yang dibagikan ke anggota klasternya
+CLUSTER_SHARED = ["raw_text", "key_phrases", "topic_tag", "mention_phrase", "lat", "lon", "geocoder",
+                  "geocode_score", "street", "place_name", "kecamatan", "kab_kota", "provinsi"]
+
+# =========================
+# Olah rows: isi → lokasi → koordinat
+# =========================
+def title_roots(rows, args):
+    """Indeks → indeks wakil klaster menurut judul (identitas bila --no-cluster)."""
+    if args.no_cluster:
+        return list(range(len(rows)))
+    gaz=ensure_gazetteer()
+    # judul mirip yang menyebut tempat berbeda ("demo di Makassar" vs "demo di Surabaya") tidak digabung;
+    # akhiran nama media ("- Tribun Medan") dibuang dulu supaya tidak terbaca sebagai tempat
+    return near_dup_roots([title_tokens(r["title"]) for r in rows], args.cluster_jaccard,
+                          keys=[frozenset(m.lower() for m in gaz.find(_TITLE_SOURCE_RE.sub("", r["title"] or "")))
+                                for r in rows])
 
-        if qi >= need_feeds and len(rows) >= args.target:
-            break
+def enrich_rows(rows, args):
+    """Klaster near-duplicate → isi artikel (mode full) → NER → topik → geocode, hanya untuk
+    wakil tiap klaster; hasilnya dibagikan ke anggota. Baris diubah di tempat."""
+    if not rows:
+        return rows
+    n_reps = _enrich_clusters(rows, title_roots(rows, args), args)
+    print(f"Clusters: {len(rows)} articles → {n_reps} stories")
+    return rows
 
+def enrich_chunks(rows, args, chunk_size=500):
+    """Seperti enrich_rows, tetapi per potongan ±chunk_size klaster judul (anggota ikut wakilnya);
+    tiap potongan yang selesai di-yield lalu dilepas dari `rows`, jadi isi artikel, teks dan hasil
+    geocode tidak menumpuk. Penggabungan klaster berdasarkan isi (mode full) hanya dalam potongan."""
     if not rows:
-        pd.DataFrame([]).to_csv(args.out, index=False); print("No results."); return
+        return
+    roots = title_roots(rows, args)
+    groups = {}
+    for i, root in enumerate(roots):
+        groups.setdefault(root, []).append(i)
+    clusters = list(groups.values())
+    n_reps = 0
+    # mode full: satu event loop, klien artikel dan process pool trafilatura untuk semua potongan
+    with warm_scope(args) if args.mode == "full" else nullcontext():
+        for k in range(0, len(clusters), max(1, chunk_size)):
+            idx = [i for members in clusters[k:k + chunk_size] for i in members]
+            pos = {i: p for p, i in enumerate(idx)}
+            chunk = [rows[i] for i in idx]
+            n_reps += _enrich_clusters(chunk, [pos[roots[i]] for i in idx], args)
+            for i in idx:
+                rows[i] = None
+            yield chunk
+    print(f"Clusters: {len(roots)} articles → {n_reps} stories")
+
+def _enrich_clusters(rows, roots, args):
+    """Olah wakil klaster `roots` (indeks ke rows) dan bagikan hasilnya ke anggota. → jumlah wakil."""
+    # ambil + ekstrak isi artikel jika mode full (pipeline, HTML tidak ditumpuk)
+    url2body = {}
+    if args.mode=="full":
+        reps=sorted(set(roots))
+        with METRICS.stage("fetch_extract"):
+            url2body = run_async(fetch_extract([rows[i]["source_url"] for i in reps],
+                                               extract_workers=args.extract_workers, queue_size=args.fetch_queue,
+                                               per_host=args.fetch_per_host, retries=args.fetch_retries,
+                                               host_interval=args.fetch_host_interval, max_bytes=args.fetch_max_bytes))
+        if not args.no_cluster:
+            # isi hampir sama (shingle 3 kata) → klaster dengan judul berbeda ikut digabung
+            body_roots=near_dup_roots([body_shingles(url2body.get(rows[i]["source_url"],"")) for i in reps],
+                                      args.cluster_jaccard)
+            remap={i: reps[k] for i, k in zip(reps, body_roots)}
+            roots=[remap[i] for i in roots]
 
-    # ambil isi artikel jika mode full
-    url2html = asyncio.run(fetch_html(urls, mode=args.mode))
+    reps=[rows[i] for i in sorted(set(roots))]
+    _enrich_reps(reps, url2body, args)
 
+    size=Counter(roots)
+    for r, root in zip(rows, roots):
+        rep=rows[root]
+        if rep is not r:
+            for c in CLUSTER_SHARED:
+                r[c]=rep.get(c)
+        r["cluster_id"]=rep["id"]; r["cluster_size"]=size[root]
+    METRICS.inc("cluster_members_skipped_total", len(rows)-len(reps))
+    return len(reps)
+
+def _enrich_reps(rows, url2body, args):
     # ekstraksi lokasi & topik
-    all_cands=set()
+    all_cands=set(); texts=[]
     for r in rows:
-        body = extract_text(url2html.get(r["source_url"],""), r["source_url"]) if args.mode=="full" else ""
-        text=(r["title"] or "")+"\n"+(body or "")
-        locs=extract_locs(text)
+        body = url2body.get(r["source_url"],"")
+        texts.append((r["title"] or "")+"\n"+(body or ""))
         r["raw_text"]=body[:1500]
+
+    PROGRESS.update("ner", 0, len(texts))
+    t0=time.perf_counter()
+    with METRICS.stage("ner"):
+        all_locs=extract_locs_batch(texts, batch_size=args.ner_batch, n_process=args.ner_workers)
+    dt=time.perf_counter()-t0
+    PROGRESS.update("ner", len(texts), len(texts))
+    METRICS.inc("ner_docs_total", len(texts))
+    print(f"NER: {len(texts)} docs in {dt:.2f}s ({len(texts)/dt if dt > 0 else 0:.1f} docs/s, workers={args.ner_workers})")
+
+    # kandidat per baris: 6 frasa NER/regex teratas + sebutan gazetteer (resolusi lokal)
+    gaz=ensure_gazetteer(); row_cands=[]
+    for r, text, locs, topic in zip(rows, texts, all_locs, ensure_rules().topics(texts)):
         r["key_phrases"]="; ".join(locs[:10])
-        s=text.lower()
-        r["topic_tag"]=("AFFAN" if "affan" in s else
-                        ("POLISI" if any(k in s for k in ["polisi","brimob","polda","polres","polresta"]) else
-                         ("DPR" if any(k in s for k in ["dpr","parlemen","gedung dpr"]) else "UMUM")))
-        for l in locs[:6]: all_cands.add(l)
+        seen={l.lower() for l in locs[:6]}
+        cands=locs[:6]+[m for m in gaz.find(text) if m.lower() not in seen]
+        row_cands.append(cands)
+        r["topic_tag"]=topic
+        # hanya kandidat sebelum hit lokal pertama yang perlu geocoder jaringan
+        for l in cands:
+            if geo_priority(geo_key(l, args.province)): break
+            all_cands.add(l)
 
-    geo_cache=geocode_candidates(sorted(all_cands,key=lambda x:(-len(x),x)), args.province)
+    with METRICS.stage("geocode"):
+        geo_cache=geocode_candidates(sorted(all_cands,key=lambda x:(-len(x),x)), args.province,
+                                     cache_path=args.geo_cache, workers=args.geo_workers,
+                                     ttl_days=args.geo_ttl_days, neg_ttl_hours=args.geo_neg_ttl_hours)
 
-    for r in rows:
-        locs=[x.strip() for x in r.get("key_phrases","").split(";") if x.strip()]
+    for r, cands in zip(rows, row_cands):
         best=None
-        for cand in locs[:6]:
-            g=geo_cache.get(cand)
+        for cand in cands:
+            g=geo_cache.get(cand) or geo_priority(geo_key(cand, args.province))
             if g: best=(cand,g); break
         if best:
             c,g=best
@@ -382,15 +1794,704 @@ def main():
                 "kecamatan":g.get("kecamatan"), "kab_kota":g.get("kab_kota"),
                 "provinsi":g.get("provinsi"),
             })
+    fill_admin(rows)
+
+# =========================
+# Kubus agregat: jam × wilayah × topik × domain (metrik, tren & hitungan filter di app)
+# =========================
+CUBE_DIMS = ["hour", "provinsi", "kab_kota", "topic_tag", "source_domain", "geocoded"]
+
+def _present(v):
+    return v is not None and v == v and v != ""  # v == v: buang NaN
+
+def cube_key(r):
+    """Sel kubus untuk satu baris: awal jam UTC (ISO) + dimensi; kosong = "" (aman sebagai kunci SQLite)."""
+    pub = r.get("published_at_utc")
+    if _present(pub) and not isinstance(pub, str):
+        pub = pub.isoformat()
+    hour = pub[:13] + ":00:00+00:00" if _present(pub) else ""
+    dims = [str(r[c]) if _present(r.get(c)) else "" for c in ("provinsi", "kab_kota", "topic_tag", "source_domain")]
+    return (hour, *dims, int(_present(r.get("lat")) and _present(r.get("lon"))))
+
+def cube_counts(rows, sign=1):
+    """{sel: [artikel, cerita]}; cerita = wakil klaster (baris tanpa klaster dihitung sendiri)."""
+    cells = {}
+    for r in rows:
+        c = cells.setdefault(cube_key(r), [0, 0])
+        c[0] += sign
+        c[1] += sign * (r.get("cluster_id") in (None, "", r.get("id")))
+    return cells
+
+def cube_frame(cells):
+    """dict sel → DataFrame bertipe: hour datetime UTC, dimensi kategori, geocoded bool, n/stories int."""
+    df = pd.DataFrame([(*k, n, st) for k, (n, st) in cells.items()], columns=CUBE_DIMS + ["n", "stories"])
+    df["hour"] = pd.to_datetime(df["hour"].replace("", None), errors="coerce", utc=True)
+    for c in CUBE_DIMS[1:-1]:
+        df[c] = df[c].replace("", None).astype("category")
+    df["geocoded"] = df["geocoded"].astype(bool)
+    df[["n", "stories"]] = df[["n", "stories"]].astype("int64")
+    return df
+
+# =========================
+# Store artikel (mode --incremental)
+# =========================
+ARTICLE_STORE_PATH = "articles.sqlite"
+
+def parse_when(when: str):
+    """'12h' / '7d' / '90m' → timedelta (default jam bila tanpa satuan)."""
+    m = re.fullmatch(r"\s*(\d+)\s*([mhd]?)\s*", when or "")
+    if not m:
+        raise ValueError(f"format --when tidak dikenal: {when!r}")
+    n, unit = int(m.group(1)), m.group(2) or "h"
+    unit = {"m": "minutes", "h": "hours", "d": "days"}[unit]
+    return timedelta(**{unit: n})
+
+class ArticleStore:
+    """Artikel yang sudah diolah, kunci = id (md5 link). Upsert per crawl, kedaluwarsa per jendela --when."""
+    def __init__(self, path=ARTICLE_STORE_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS articles ("
+                        "id TEXT PRIMARY KEY, published_at_utc TEXT, first_seen REAL NOT NULL, data TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS articles_published ON articles(published_at_utc)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS cube (hour TEXT, provinsi TEXT, kab_kota TEXT, topic_tag TEXT, "
+                        "source_domain TEXT, geocoded INTEGER, n INTEGER NOT NULL, stories INTEGER NOT NULL, "
+                        "PRIMARY KEY (hour, provinsi, kab_kota, topic_tag, source_domain, geocoded))")
+        if (not self.db.execute("SELECT 1 FROM cube LIMIT 1").fetchone()
+                and self.db.execute("SELECT 1 FROM articles LIMIT 1").fetchone()):
+            self._bump(cube_counts(self.all()))  # store lama tanpa kubus: bangun sekali
+        self.db.commit()
+
+    def _bump(self, cells):
+        """Tambahkan delta ke kubus; sel yang jadi kosong dihapus."""
+        self.db.executemany(
+            "INSERT INTO cube VALUES (?,?,?,?,?,?,?,?) ON CONFLICT DO UPDATE "
+            "SET n = n + excluded.n, stories = stories + excluded.stories",
+            [(*k, n, st) for k, (n, st) in cells.items() if n or st])
+        self.db.execute("DELETE FROM cube WHERE n <= 0")
+
+    def _data(self, ids):
+        ids = list(ids); out = []
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i+500]
+            q = "SELECT data FROM articles WHERE id IN (%s)" % ",".join("?"*len(chunk))
+            out.extend(json.loads(d) for (d,) in self.db.execute(q, chunk))
+        return out
+
+    def known_ids(self, ids):
+        ids = list(dict.fromkeys(ids)); out = set()
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i+500]
+            q = "SELECT id FROM articles WHERE id IN (%s)" % ",".join("?"*len(chunk))
+            out.update(r[0] for r in self.db.execute(q, chunk))
+        return out
+
+    def upsert(self, rows):
+        now = time.time()
+        old = self._data(r["id"] for r in rows)  # versi lama (bila ada) keluar dari kubus
+        delta = cube_counts(rows)
+        for k, (n, st) in cube_counts(old, sign=-1).items():
+            c = delta.setdefault(k, [0, 0]); c[0] += n; c[1] += st
+        self._bump(delta)
+        self.db.executemany(
+            "INSERT INTO articles (id, published_at_utc, first_seen, data) VALUES (?,?,?,?) "
+            "ON CONFLICT(id) DO UPDATE SET published_at_utc=excluded.published_at_utc, data=excluded.data",
+            [(r["id"], r.get("published_at_utc"), now, json.dumps(r, ensure_ascii=False)) for r in rows])
+        self.db.commit()
+
+    def expire(self, older_than: datetime):
+        """Hapus artikel di luar jendela; tanpa tanggal terbit → pakai waktu pertama terlihat."""
+        where = ("WHERE (published_at_utc IS NOT NULL AND published_at_utc < ?) "
+                 "OR (published_at_utc IS NULL AND first_seen < ?)")
+        params = (older_than.astimezone(UTC).isoformat(), older_than.timestamp())
+        gone = [json.loads(d) for (d,) in self.db.execute("SELECT data FROM articles " + where, params)]
+        self._bump(cube_counts(gone, sign=-1))
+        cur = self.db.execute("DELETE FROM articles " + where, params)
+        self.db.commit()
+        self._promote({r["id"] for r in gone if r.get("cluster_id") == r["id"] and (r.get("cluster_size") or 1) > 1})
+        return cur.rowcount
+
+    def _promote(self, lost):
+        """Klaster yang wakilnya kedaluwarsa: anggota tersisa paling awal terbit jadi wakil baru
+        (kalau tidak, klaster itu tidak lagi dihitung sebagai cerita di kubus)."""
+        lost = list(lost); groups = {}
+        for i in range(0, len(lost), 500):
+            chunk = lost[i:i+500]
+            q = "SELECT data FROM articles WHERE json_extract(data, '$.cluster_id') IN (%s)" % ",".join("?"*len(chunk))
+            for (d,) in self.db.execute(q, chunk):
+                r = json.loads(d); groups.setdefault(r["cluster_id"], []).append(r)
+        promoted = []
+        for members in groups.values():
+            rep = min(members, key=lambda r: (r.get("published_at_utc") or "", r["id"]))
+            for r in members:
+                r["cluster_id"] = rep["id"]; r["cluster_size"] = len(members)
+            promoted += members
+        if promoted:
+            self.upsert(promoted)  # kubus: versi lama keluar, versi dengan wakil baru masuk
+
+    def cube(self):
+        return {tuple(r[:6]): [r[6], r[7]] for r in self.db.execute("SELECT * FROM cube")}
+
+    def all(self):
+        return [json.loads(d) for (d,) in self.db.execute(
+            "SELECT data FROM articles ORDER BY published_at_utc DESC, first_seen DESC")]
+
+    def iter_chunks(self, size=500):
+        """Seperti all(), tetapi per potongan dari kursor (untuk --stream)."""
+        cur = self.db.execute("SELECT data FROM articles ORDER BY published_at_utc DESC, first_seen DESC")
+        while True:
+            part = cur.fetchmany(size)
+            if not part:
+                return
+            yield [json.loads(d) for (d,) in part]
+
+    def close(self):
+        self.db.close()
+
+# =========================
+# Tulis hasil: CSV (+ Parquet bertipe, opsional)
+# =========================
+CATEGORY_COLS = ["source_domain", "topic_tag", "geocoder", "provinsi", "kab_kota"]
+
+def typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Kolom bertipe untuk format kolumnar: waktu UTC tz-aware, lat/lon float, kategori untuk dimensi filter."""
+    df = df.copy()
+    if "published_at_utc" in df.columns:
+        df["published_at_utc"] = pd.to_datetime(df["published_at_utc"], errors="coerce", utc=True)
+    for c in ("lat", "lon", "geocode_score"):
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return df
+
+# urutan kolom hasil (= urutan kemunculan kunci di baris hasil enrich); --stream memakai skema tetap ini
+OUTPUT_COLS = ["id", "title", "source_url", "source_domain", "published_at_utc", "q_src", "raw_text", "key_phrases",
+               "topic_tag", "mention_phrase", "lat", "lon", "geocoder", "geocode_score", "street", "place_name",
+               "kecamatan", "kab_kota", "provinsi", "cluster_id", "cluster_size"]
+
+def output_schema():
+    """Skema Arrow tetap untuk Parquet yang ditulis per potongan (setara typed_frame)."""
+    def col_type(c):
+        if c == "published_at_utc":
+            return pa.timestamp("us", tz="UTC")
+        if c in ("lat", "lon", "geocode_score"):
+            return pa.float64()
+        if c == "cluster_size":
+            return pa.int64()
+        if c in CATEGORY_COLS:
+            return pa.dictionary(pa.int32(), pa.string())
+        return pa.string()
+    return pa.schema([(c, col_type(c)) for c in OUTPUT_COLS])
+
+class StreamWriter:
+    """Tulis hasil per potongan ke <path>.tmp (CSV, + JSONL/Parquet/kubus bila diminta), lalu rename
+    atomik saat selesai. Memori = satu potongan; bila crawl gagal, potongan yang sudah selesai
+    tetap ada di file .tmp."""
+    def __init__(self, args, cube=None, total=None):
+        self.args = args
+        self.cube = cube  # sel jadi dari store; None → dijumlahkan dari potongan
+        self.total = total  # perkiraan jumlah baris, untuk progres
+        self.cells = {}
+        self.n = 0
+        self.csv = open(args.out + ".tmp", "w", encoding="utf-8", newline="")
+        self.jsonl = open(args.out_jsonl + ".tmp", "w", encoding="utf-8") if args.out_jsonl else None
+        self.parquet = pq.ParquetWriter(args.out_parquet + ".tmp", output_schema()) if args.out_parquet else None
+
+    def write(self, rows):
+        if not rows:
+            return
+        with METRICS.stage("write"):
+            df = pd.DataFrame(rows, columns=OUTPUT_COLS)
+            df.to_csv(self.csv, header=self.n == 0, index=False)
+            self.csv.flush()
+            if self.jsonl is not None:
+                for r in rows:
+                    self.jsonl.write(json.dumps({c: r.get(c) for c in OUTPUT_COLS}, ensure_ascii=False) + "\n")
+                self.jsonl.flush()
+            if self.parquet is not None:
+                self.parquet.write_table(pa.Table.from_pandas(typed_frame(df), schema=self.parquet.schema,
+                                                              preserve_index=False))
+            if self.args.out_cube and self.cube is None:
+                for k, (n, st) in cube_counts(rows).items():
+                    c = self.cells.setdefault(k, [0, 0]); c[0] += n; c[1] += st
+        self.n += len(rows)
+        METRICS.inc("rows_written_total", len(rows))
+        PROGRESS.update("write", self.n, self.total)
+
+    def close(self):
+        if self.n == 0:
+            pd.DataFrame(columns=OUTPUT_COLS).to_csv(self.csv, index=False)
+        self.csv.close()
+        os.replace(self.args.out + ".tmp", self.args.out)
+        if self.jsonl is not None:
+            self.jsonl.close()
+            os.replace(self.args.out_jsonl + ".tmp", self.args.out_jsonl)
+        if self.parquet is not None:
+            self.parquet.close()
+            os.replace(self.args.out_parquet + ".tmp", self.args.out_parquet)
+        if self.args.out_cube:
+            tmp = self.args.out_cube + ".tmp"
+            cube_frame(self.cube if self.cube is not None else self.cells).to_parquet(tmp, index=False)
+            os.replace(tmp, self.args.out_cube)
+
+    def abort(self):
+        for f in (self.csv, self.jsonl, self.parquet):
+            if f is not None:
+                f.close()
+
+def write_stream(chunks, args, cube=None, total=None):
+    """Tulis potongan hasil (iterable list baris) lewat StreamWriter. → jumlah baris."""
+    writer = StreamWriter(args, cube, total)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return writer.n
+
+def write_output(rows, args, cube=None):
+    """CSV (+ Parquet, + kubus agregat bila diminta). cube: sel dari store (--incremental);
+    tanpa itu kubus dihitung dari rows."""
+    METRICS.inc("rows_written_total", len(rows))
+    with METRICS.stage("write"):
+        df = pd.DataFrame(rows)
+        df.to_csv(args.out + ".tmp", index=False)
+        os.replace(args.out + ".tmp", args.out)
+        if args.out_parquet:
+            tmp = args.out_parquet + ".tmp"
+            typed_frame(df).to_parquet(tmp, index=False)
+            os.replace(tmp, args.out_parquet)
+        if args.out_jsonl:
+            tmp = args.out_jsonl + ".tmp"
+            df.to_json(tmp, orient="records", lines=True, force_ascii=False)
+            os.replace(tmp, args.out_jsonl)
+        if args.out_cube:
+            tmp = args.out_cube + ".tmp"
+            cube_frame(cube if cube is not None else cube_counts(rows)).to_parquet(tmp, index=False)
+            os.replace(tmp, args.out_cube)
+
+# =========================
+# Main
+# =========================
+def build_parser():
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--include", default=None, help="comma-separated keywords include (wajib, kecuali --serve tanpa --poll-every)")
+    ap.add_argument("--exclude", default="", help="comma-separated keywords exclude (title only)")
+    ap.add_argument("--rules", default=RULES_PATH, help="file aturan topik/exclude/whitelist media (JSON)")
+    ap.add_argument("--admin-boundaries", default=ADMIN_PATH,
+                    help="GeoJSON batas wilayah untuk mengisi kecamatan/kab_kota/provinsi dari koordinat")
+    ap.add_argument("--when", default="24h", help="12h/24h/48h/72h/7d")
+    ap.add_argument("--province", default=None, help="bias geocode ke provinsi (mis. 'DKI Jakarta')")
+    ap.add_argument("--mode", default="fast", choices=["fast","full"], help="fast=judul saja, full=unduh isi artikel")
+    ap.add_argument("--out", default="demo_out.csv", help="output CSV path")
+    ap.add_argument("--out-parquet", default=None, help="juga tulis Parquet bertipe (kolom kategori, waktu UTC)")
+    ap.add_argument("--out-cube", default=None, help="juga tulis kubus agregat jam×wilayah×topik×domain (Parquet)")
+    ap.add_argument("--out-jsonl", default=None, help="juga tulis JSON Lines (satu artikel per baris)")
+    ap.add_argument("--stream", action="store_true",
+                    help="olah & tulis per potongan (memori tetap berapa pun --target; hasil parsial tersisa di *.tmp)")
+    ap.add_argument("--chunk-size", type=int, default=500, help="jumlah klaster per potongan untuk --stream")
+    ap.add_argument("--id-media-only", action="store_true", help="Hanya ambil artikel dari media Indonesia")
+    # fitur multi-feed
+    ap.add_argument("--target", type=int, default=500, help="target jumlah artikel (perkiraan)")
+    ap.add_argument("--wide", action="store_true", help="gunakan paket query luas (topik+seluruh provinsi/kota)")
+    ap.add_argument("--queries", default="", help="tambahan query kustom, pisahkan koma")
+    ap.add_argument("--feed-workers", type=int, default=8, help="jumlah feed RSS yang diunduh paralel")
+    ap.add_argument("--extract-workers", type=int, default=None, help="jumlah proses trafilatura (mode full; default=jumlah CPU)")
+    ap.add_argument("--fetch-queue", type=int, default=32, help="maks. halaman HTML yang menunggu ekstraksi (mode full)")
+    ap.add_argument("--fetch-per-host", type=int, default=FETCH_PER_HOST, help="unduhan artikel paralel maks. per host (mode full)")
+    ap.add_argument("--fetch-host-interval", type=float, default=FETCH_HOST_INTERVAL, help="jeda minimum antar-unduhan ke host yang sama (detik)")
+    ap.add_argument("--fetch-retries", type=int, default=FETCH_RETRIES, help="percobaan ulang untuk 429/5xx/timeout")
+    ap.add_argument("--fetch-max-bytes", type=int, default=FETCH_MAX_BYTES, help="batas ukuran HTML per artikel (sisanya dipotong)")
+    ap.add_argument("--ner-workers", type=int, default=1, help="jumlah proses spaCy untuk NER (nlp.pipe n_process)")
+    ap.add_argument("--ner-batch", type=int, default=64, help="ukuran batch nlp.pipe")
+    ap.add_argument("--geo-workers", type=int, default=4, help="jumlah kandidat lokasi yang di-geocode paralel")
+    ap.add_argument("--geo-cache", default=GEO_CACHE_PATH, help="path cache geocode (SQLite)")
+    ap.add_argument("--geo-ttl-days", type=float, default=GEO_TTL_DAYS, help="umur cache untuk lokasi yang ketemu")
+    ap.add_argument("--incremental", action="store_true", help="hanya olah artikel baru; gabung ke store, buang yang di luar --when")
+    ap.add_argument("--store", default=ARTICLE_STORE_PATH, help="path store artikel untuk --incremental (SQLite)")
+    ap.add_argument("--query-stats", default=QUERY_STATS_PATH, help="riwayat yield per query untuk perencana (SQLite)")
+    ap.add_argument("--url-cache", default=URL_CACHE_PATH, help="path cache URL kanonis redirect Google News (SQLite)")
+    ap.add_argument("--geo-neg-ttl-hours", type=float, default=GEO_NEG_TTL_HOURS, help="umur cache untuk lokasi yang tidak ketemu")
+    ap.add_argument("--cluster-jaccard", type=float, default=CLUSTER_JACCARD,
+                    help="kemiripan minimum untuk menggabung berita hampir sama (judul; isi di mode full)")
+    ap.add_argument("--no-cluster", action="store_true", help="olah setiap artikel sendiri-sendiri")
+    ap.add_argument("--progress", default=None, help="tulis progres per tahap ke file JSON ini")
+    ap.add_argument("--metrics-json", default=None, help="tulis laporan run (tahap, counter, histogram) ke JSON ini")
+    ap.add_argument("--metrics-prom", default=None, help="tulis metrik format teks Prometheus ke file ini")
+    # mode daemon
+    ap.add_argument("--serve", default=None, metavar="HOST:PORT",
+                    help="jalan sebagai daemon: model & klien tetap hangat, terima POST /crawl (mis. 127.0.0.1:8765)")
+    ap.add_argument("--poll-every", default=None, help="dengan --serve: ulangi crawl argumen ini tiap 15m/1h/...")
+    ap.add_argument("--serve-root", default=".", help="dengan --serve: path output/cache job harus di bawah direktori ini")
+    return ap
+
+def crawl(args):
+    # siapkan daftar query
+    include_terms = [x.strip() for x in args.include.split(",") if x.strip()]
+    base_core     = ["dpr","parlemen","gedung dpr","polisi","polda","polres","brimob","affan"]
+    base_query    = " OR ".join(f"({k})" for k in (include_terms + base_core))
+
+    queries = [base_query]
+    if args.wide:
+        queries.extend(build_wide_queries())
+    if args.queries.strip():
+        queries.extend([q.strip() for q in args.queries.split(",") if q.strip()])
+    # dedup
+    queries = list(dict.fromkeys(queries))
+
+    exc=[x.strip().lower() for x in args.exclude.split(",") if x.strip()]
+    ensure_rules(args.rules, exclude=exc)
+    ensure_admin(args.admin_boundaries)
+
+    with METRICS.stage("feeds"):
+        rows, n_feeds = run_async(collect_rows(queries, args))
+
+    if args.incremental:
+        # hanya id baru yang diunduh/NER/geocode; hasil = isi store dalam jendela --when
+        store = ArticleStore(args.store)
+        cutoff = datetime.now(UTC) - parse_when(args.when)
+        try:
+            known = store.known_ids([r["id"] for r in rows])
+            fresh = [r for r in rows if r["id"] not in known]
+            # terbit di luar jendela: store akan langsung membuangnya, jadi jangan diolah sama sekali
+            since = cutoff.isoformat()
+            in_window = [r for r in fresh if not (r["published_at_utc"] and r["published_at_utc"] < since)]
+            stale = len(fresh) - len(in_window); fresh = in_window
+            METRICS.inc("entries_filtered_total", stale, reason="outside_when")
+            if args.stream:
+                for chunk in enrich_chunks(fresh, args, args.chunk_size):
+                    store.upsert(chunk)  # potongan yang selesai langsung aman di store
+            else:
+                enrich_rows(fresh, args)
+                store.upsert(fresh)
+            expired = store.expire(cutoff)
+            if args.stream:
+                n_rows = write_stream(store.iter_chunks(args.chunk_size), args, store.cube())
+            else:
+                rows = store.all()
+                cube = store.cube()
+        finally:
+            store.close()
+        print(f"Incremental: {len(fresh)} new, {stale} outside --when, {len(known)} already stored, {expired} expired")
+        if args.stream:
+            print(f"Saved: {args.out} rows={n_rows} (store: {args.store}, streamed)"); return
+        if not rows:
+            write_output([], args); print("No results."); return
+        write_output(rows, args, cube)
+        print(f"Saved: {args.out} rows={len(rows)} (store: {args.store})")
+        return
+
+    if not rows:
+        write_output([], args); print("No results."); return
+
+    if args.stream:
+        n_rows = write_stream(enrich_chunks(rows, args, args.chunk_size), args, total=len(rows))
+        print(f"Saved: {args.out} rows={n_rows} using {n_feeds} feed(s) (streamed)")
+        return
+
+    enrich_rows(rows, args)
 
     # potong bila > target
     if len(rows) > args.target:
         rows = rows[:args.target]
 
-    pd.DataFrame(rows).to_csv(args.out, index=False)
-    print(f"Saved: {args.out} rows={len(rows)} using up to {min(len(queries), need_feeds)} feed(s)")
+    write_output(rows, args)
+    print(f"Saved: {args.out} rows={len(rows)} using {n_feeds} feed(s)")
     if args.id_media_only:
         print("Note: filtered to Indonesian media only.")
 
+def run(args):
+    """Satu crawl lengkap + progres/metrik ke file yang diminta (CLI dan tiap job daemon)."""
+    PROGRESS.path = args.progress
+    PROGRESS.stages = {}
+    try:
+        crawl(args)
+    finally:
+        if args.metrics_json: METRICS.write_json(args.metrics_json)
+        if args.metrics_prom: METRICS.write_prom(args.metrics_prom)
+
+# =========================
+# Mode --serve: daemon dengan model hangat, klien bersama, polling terjadwal
+# =========================
+DAEMON_JOB_KEEP = 3600  # detik job selesai tetap bisa ditanyakan statusnya
+DAEMON_TOKEN = os.getenv("CRAWLER_DAEMON_TOKEN")  # wajib bila --serve tidak diikat ke loopback
+# argumen path yang boleh diisi job dari POST /crawl: harus berada di bawah --serve-root
+DAEMON_PATH_ARGS = ("out", "out_parquet", "out_cube", "out_jsonl", "progress", "metrics_json", "metrics_prom",
+                    "store", "query_stats", "url_cache", "geo_cache", "rules", "admin_boundaries")
+
+class Warm:
+    """Sumber daya yang hidup sepanjang daemon: satu event loop (thread sendiri) untuk semua crawl,
+    klien feed & artikel dengan pool koneksi tetap, dan process pool trafilatura."""
+    def __init__(self, feed_workers=8, fetch_concurrency=12, extract_workers=None):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="crawler-loop", daemon=True).start()
+        self.clients = self.run(self._open(feed_workers, fetch_concurrency))
+        self.extract_workers = extract_workers
+        self._pool = None
+
+    @staticmethod
+    async def _open(feed_workers, fetch_concurrency):
+        return {"feed": feed_client(feed_workers), "article": ArticleFetcher(fetch_concurrency).new_client()}
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def extract_pool(self, n_workers):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.extract_workers or n_workers)
+        return self._pool
+
+    def close(self):
+        async def _close():
+            for c in self.clients.values():
+                await c.aclose()
+        self.run(_close())
+        if self._pool is not None:
+            self._pool.shutdown()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+class DaemonJob:
+    def __init__(self, job_id, key, args):
+        self.id = job_id
+        self.key = key  # hash argumen; job aktif dengan key sama digabung
+        self.args = args
+        self.status = "queued"  # queued / running / done / failed / cancelled
+        self.created = time.time()
+        self.started = self.finished = None
+        self.cancelled = False
+        self.log = ""
+
+    def info(self):
+        return {"id": self.id, "status": self.status, "created": self.created, "started": self.started,
+                "finished": self.finished, "log": self.log[-4000:]}
+
+class CrawlDaemon:
+    """Antrean job crawl, dikerjakan satu per satu (progres, aturan, dan budget geocode bersifat global).
+    Job dengan argumen sama yang masih antre/berjalan (dan tidak dibatalkan) digabung, seperti JobManager di app."""
+    def __init__(self, parser, root=".", token=None):
+        self.parser = parser
+        self.root = os.path.realpath(root)
+        self.token = token
+        self.jobs = {}     # id → DaemonJob
+        self._active = {}  # key → job terakhir dengan argumen itu
+        self._seq = 0
+        self.started = time.time()
+        self.metrics = Metrics()  # total semua job sejak daemon mulai (GET /metrics)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._worker, name="crawler-jobs", daemon=True).start()
+
+    def parse(self, argv):
+        """Argumen CLI crawl dari request → Namespace; ValueError bila tidak valid."""
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            raise ValueError("args harus berupa list string")
+        try:
+            args = self.parser.parse_args(argv)
+        except SystemExit:
+            raise ValueError("argumen crawl tidak valid") from None
+        if not args.include or args.serve or args.poll_every:
+            raise ValueError("--include wajib; --serve/--poll-every tidak berlaku untuk job")
+        for dest in DAEMON_PATH_ARGS:
+            path = getattr(args, dest)
+            if path and path != self.parser.get_default(dest) and not self.allowed(path):
+                raise ValueError(f"--{dest.replace('_', '-')} harus berada di bawah {self.root}")
+        return args
+
+    def allowed(self, path):
+        path = os.path.realpath(path)
+        return os.path.commonpath([path, self.root]) == self.root
+
+    def authorized(self, header):
+        """Header Authorization 'Bearer <token>'; tanpa token terkonfigurasi semua diterima (loopback)."""
+        return not self.token or hmac.compare_digest(header or "", f"Bearer {self.token}")
+
+    def submit(self, key, args):
+        """→ (job, baru?)"""
+        now = time.time()
+        with self._lock:
+            for k in [k for k, j in self.jobs.items() if j.finished and now - j.finished > DAEMON_JOB_KEEP]:
+                old = self.jobs.pop(k)
+                if self._active.get(old.key) is old:
+                    del self._active[old.key]
+            job = self._active.get(key)
+            if job is not None and job.status in ("queued", "running") and not job.cancelled:
+                return job, False
+            self._seq += 1
+            job = DaemonJob(f"{key}-{self._seq}", key, args)
+            self.jobs[job.id] = self._active[key] = job
+        self._queue.put(job)
+        return job, True
+
+    def cancel(self, job_id):
+        """Job antre dibatalkan langsung; job berjalan berhenti di titik progres berikutnya
+        (PROGRESS.update melempar CrawlCancelled) tanpa menulis output."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status in ("queued", "running") and not job.cancelled:
+                job.cancelled = True
+                if job.status == "queued":
+                    job.status = "cancelled"; job.finished = time.time()
+                else:
+                    PROGRESS.cancelled.set()
+        return job
+
+    def poll(self, args, every):
+        while True:
+            self.submit("poll", args)
+            time.sleep(every)
+
+    def health(self):
+        busy = [j.id for j in self.jobs.values() if j.status == "running"]
+        return {"ok": True, "uptime": round(time.time() - self.started, 1), "running": busy,
+                "queued": self._queue.qsize(), "nlp": _NLP is not None}
+
+    def _worker(self):
+        global METRICS
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.cancelled:
+                    continue
+                PROGRESS.cancelled.clear()
+                job.status = "running"; job.started = time.time()
+            out = io.StringIO()
+            METRICS = Metrics()  # laporan --metrics-* job ini hanya berisi job ini
+            try:
+                with redirect_stdout(out):
+                    run(job.args)
+                job.status = "cancelled" if job.cancelled else "done"
+            except Exception:
+                if job.cancelled:
+                    out.write("Dibatalkan.\n")
+                    job.status = "cancelled"
+                else:
+                    out.write(traceback.format_exc())
+                    job.status = "failed"
+            finally:
+                self.metrics.merge(METRICS)
+            job.log = out.getvalue()
+            job.finished = time.time()
+            print(f"[{job.id}] {job.status} in {job.finished - job.started:.1f}s", flush=True)
+
+def _daemon_handler(daemon):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        """GET /health, /metrics, /jobs/<id>; POST /crawl {"args": [...]}, /jobs/<id>/cancel."""
+        def _send(self, code, body, ctype="application/json"):
+            if not isinstance(body, bytes):
+                body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _job(self, key):
+            job = daemon.jobs.get(key)
+            if job is None:
+                self._send(404, {"error": f"job {key} tidak ada"})
+            return job
+
+        def _denied(self):
+            if self.path == "/health" or daemon.authorized(self.headers.get("Authorization")):
+                return False
+            self._send(401, {"error": "token salah atau tidak ada"})
+            return True
+
+        def do_GET(self):
+            if self._denied():
+                return
+            if self.path == "/health":
+                self._send(200, daemon.health())
+            elif self.path == "/metrics":
+                self._send(200, daemon.metrics.prom_text().encode("utf-8"), "text/plain; version=0.0.4")
+            elif self.path.startswith("/jobs/"):
+                job = self._job(self.path[len("/jobs/"):])
+                if job is not None:
+                    self._send(200, job.info())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self._denied():
+                return
+            try:
+                req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": "body bukan JSON"})
+            m = re.fullmatch(r"/jobs/([\w-]+)/cancel", self.path)
+            if self.path == "/crawl":
+                argv = req.get("args") if isinstance(req, dict) else None
+                try:
+                    args = daemon.parse(argv)
+                except ValueError as e:
+                    return self._send(400, {"error": str(e)})
+                job, new = daemon.submit(hashlib.sha1(json.dumps(argv).encode()).hexdigest()[:12], args)
+                self._send(202 if new else 200, {"job": job.info(), "new": new})
+            elif m:
+                job = self._job(m.group(1))
+                if job is not None:
+                    self._send(200, daemon.cancel(job.id).info())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, *a):
+            pass
+
+    return Handler
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def serve(args, parser):
+    """Daemon: model NER, gazetteer, aturan, event loop dan klien HTTP dimuat sekali; crawl dari app
+    (POST /crawl) dan polling --poll-every berjalan tanpa cold start. Metrik kumulatif di /metrics."""
+    global _WARM
+    from http.server import ThreadingHTTPServer
+    every = parse_when(args.poll_every).total_seconds() if args.poll_every else 0
+    if every and not args.include:
+        parser.error("--poll-every butuh --include (query yang dijadwalkan)")
+    host, _, port = args.serve.rpartition(":")
+    host = host.strip("[]") or "127.0.0.1"
+    if not DAEMON_TOKEN and not _is_loopback(host):
+        parser.error(f"--serve {args.serve}: bind selain loopback butuh CRAWLER_DAEMON_TOKEN")
+    t0 = time.perf_counter()
+    ensure_nlp(); ensure_gazetteer(); ensure_rules(args.rules); ensure_admin(args.admin_boundaries)
+    _WARM = Warm(args.feed_workers, extract_workers=args.extract_workers)
+    print(f"Warm-up: {time.perf_counter() - t0:.2f}s (spaCy {'ok' if _NLP is not None else 'tidak tersedia'})")
+    daemon = CrawlDaemon(parser, args.serve_root, DAEMON_TOKEN)
+    server = ThreadingHTTPServer((host, int(port)), _daemon_handler(daemon))
+    if every:
+        threading.Thread(target=daemon.poll, args=(args, every), name="crawler-poll", daemon=True).start()
+    print(f"Serving on http://{host}:{port} (job paths under {daemon.root})"
+          + (f", polling every {args.poll_every}" if every else ""), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        _WARM.close()
+        _WARM = None
+
+def main():
+    ap=build_parser()
+    args=ap.parse_args()
+    if args.serve:
+        serve(args, ap); return
+    if not args.include:
+        ap.error("--include wajib")
+    run(args)
+
 if __name__ == "__main__":
     main()
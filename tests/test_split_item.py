@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import rss_crawl_fast as c
+
+
+def _day_windows(subs):
+    """Jendela [after, before) tiap pecahan per hari, persis seperti plan_feed_url membangunnya."""
+    today = datetime.now(c.UTC).date()
+    return [(today - timedelta(days=d), today - timedelta(days=d - 1)) for _, _, d in subs]
+
+
+@pytest.mark.parametrize("when", ["48h", "49h", "60h", "2d", "7d"])
+def test_split_item_covers_when_window(when):
+    now = datetime.now(c.UTC)
+    subs = c.split_item(("banjir", when, None))
+    windows = _day_windows(subs)
+    assert min(a for a, _ in windows) <= (now - c.parse_when(when)).date()
+    assert max(b for _, b in windows) > now.date()
+    # hari berurutan tanpa celah
+    assert sorted(d for *_, d in subs) == list(range(len(subs)))
+
+
+def test_split_item_short_window_not_split_by_day():
+    assert c.split_item(("banjir", "24h", None)) == []
+
+
+def test_split_item_or_terms_before_days():
+    assert c.split_item(("a OR b", "7d", None)) == [("a", "7d", None), ("b", "7d", None)]
+
+
+def test_split_item_day_item_is_final():
+    assert c.split_item(("banjir", "7d", 3)) == []